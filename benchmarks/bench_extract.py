@@ -0,0 +1,83 @@
+# Compares PyMuPDF text extraction variants on the sample PDFs (or any PDF): get_text('text') with
+# the default and the --extract fast flags, a clipped TextPage, and the 'blocks', 'dict' and
+# 'rawdict' outputs joined back into text. Reports pages/s and how many pages come out identical
+# to the default extraction the scraper's regexes were written against.
+#
+#   python benchmarks/bench_extract.py
+#   python benchmarks/bench_extract.py --pdf big_export.pdf --repeat 3 --clip-top 40
+from os import path
+import argparse
+import os
+import time
+
+import fitz
+
+from checkout import load_checkout, repo_dir
+
+
+def blocks_text(page, flags):
+    return ''.join(block[4] for block in page.get_text('blocks', flags=flags) if block[6] == 0)
+
+
+def dict_text(page, flags):
+    return ''.join(''.join(span['text'] for span in line['spans']) + '\n'
+                   for block in page.get_text('dict', flags=flags)['blocks'] for line in block.get('lines', []))
+
+
+def rawdict_text(page, flags):
+    return ''.join(''.join(char['c'] for span in line['spans'] for char in span['chars']) + '\n'
+                   for block in page.get_text('rawdict', flags=flags)['blocks'] for line in block.get('lines', []))
+
+
+def variants(pdf_scrape, clip_top):
+    fast_flags = pdf_scrape.extract.fast_text_flags
+    fast = pdf_scrape.extract.ExtractOptions(True, 0)
+    result = {
+        'text default': lambda page: page.get_text(),
+        'text fast': lambda page: page.get_text(flags=fast_flags),
+        'textpage fast': lambda page: pdf_scrape.extract.extract_page_text(page, fast),
+        'blocks fast': lambda page: blocks_text(page, fast_flags),
+        'dict fast': lambda page: dict_text(page, fast_flags),
+        'rawdict fast': lambda page: rawdict_text(page, fast_flags),
+    }
+    if clip_top:
+        clipped = pdf_scrape.extract.ExtractOptions(True, clip_top)
+        result[f'textpage fast clip_top={clip_top:g}'] = lambda page: pdf_scrape.extract.extract_page_text(page, clipped)
+    return result
+
+
+def bench(doc, extract, repeat):
+    texts = []
+    start = time.perf_counter()
+    for _ in range(repeat):
+        texts = [extract(doc[page_index]) for page_index in range(doc.page_count)]
+    return texts, time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Time PyMuPDF text extraction variants.')
+    parser.add_argument('--checkout', default=repo_dir,
+                        help='checkout whose pdf_scrape package is benchmarked (default: this one)')
+    parser.add_argument('--pdf', nargs='+', help='PDFs to extract (default: the sample PDFs in input/)')
+    parser.add_argument('--repeat', type=int, default=20, help='passes over every page (default: 20)')
+    parser.add_argument('--clip-top', type=float, default=0,
+                        help='also time a TextPage clipped this many points below the page top (default: off)')
+    args = parser.parse_args()
+
+    pdf_scrape = load_checkout(args.checkout)
+    input_dir = path.join(repo_dir, 'input')
+    file_paths = args.pdf or sorted(path.join(input_dir, f) for f in os.listdir(input_dir) if f.endswith('.pdf'))
+    for file_path in file_paths:
+        with fitz.open(file_path) as doc:
+            print(f'{path.basename(file_path)}: {doc.page_count} pages x {args.repeat}')
+            bench(doc, variants(pdf_scrape, 0)['text default'], 1)    # warm up fonts and page tree
+            baseline = None
+            for name, extract in variants(pdf_scrape, args.clip_top).items():
+                texts, elapsed = bench(doc, extract, args.repeat)
+                if baseline is None:
+                    baseline = [pdf_scrape.patterns.patterns['page_number'].split(text, maxsplit=1)[-1]
+                                for text in texts]
+                    texts = baseline
+                same = sum(text == expected for text, expected in zip(texts, baseline))
+                print(f'  {name:<28} {doc.page_count * args.repeat / elapsed:>9,.0f} pages/s   '
+                      f'{same}/{doc.page_count} pages identical')
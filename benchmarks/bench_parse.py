@@ -0,0 +1,55 @@
+# Micro-benchmark for the regex parsing stage: the sample PDFs are extracted once, then
+# get_order_data is timed over the order texts so text extraction does not skew the numbers.
+#
+#   python benchmarks/bench_parse.py                          # this checkout
+#   python benchmarks/bench_parse.py --checkout ../old_copy   # compare against another version
+from contextlib import redirect_stdout
+from os import path
+import argparse
+import importlib
+import io
+import os
+import time
+
+from checkout import load_checkout, repo_dir
+
+
+def bench(pdf_scrape, profile, order_texts, repeat):
+    # Every pass starts with an empty buyer cache, so each one costs what a single real run does
+    # rather than replaying buyers the previous pass already parsed (older checkouts have no cache)
+    buyer_cache = getattr(importlib.import_module('pdf_scrape.parse'), 'buyer_cache', {})
+    row_count = 0
+    # The parsers print warnings for odd items; keep them out of the timings and the report
+    with redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            buyer_cache.clear()
+            for order_info in order_texts:
+                row_count += len(pdf_scrape.get_order_data(order_info, profile))
+        elapsed = time.perf_counter() - start
+    return row_count, elapsed
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Time get_order_data on the sample order PDFs.')
+    parser.add_argument('--checkout', default=repo_dir,
+                        help='checkout whose pdf_scrape package is benchmarked (default: this one)')
+    parser.add_argument('--store', default='v3_design', help='store profile to benchmark (default: v3_design)')
+    parser.add_argument('--input', default=path.join(repo_dir, 'input'), help='folder of sample PDFs')
+    parser.add_argument('--repeat', type=int, default=200, help='passes over the sample orders (default: 200)')
+    args = parser.parse_args()
+
+    pdf_scrape = load_checkout(args.checkout)
+    profile = pdf_scrape.profiles[args.store]
+    files = sorted(f for f in os.listdir(args.input) if f.endswith('.pdf'))
+    order_texts = [order_info for f_name in files
+                   for order_info in pdf_scrape.iter_orders(pdf_scrape.iter_page_texts(path.join(args.input, f_name)))]
+
+    row_count, elapsed = bench(pdf_scrape, profile, order_texts, args.repeat)
+    print(f'{args.store}: {len(order_texts)} orders x {args.repeat} passes, '
+          f'{row_count} rows in {elapsed:.3f}s -> {row_count / elapsed:,.0f} rows/s')
+    counters = importlib.import_module('pdf_scrape.stats').stats.counters
+    if counters['buyer_cache_misses']:
+        lookups = counters['buyer_cache_hits'] + counters['buyer_cache_misses']
+        print(f"buyer cache: {counters['buyer_cache_misses'] // args.repeat} distinct buyers per pass, "
+              f"{counters['buyer_cache_hits'] / lookups:.1%} of {lookups // args.repeat} lookups per pass were hits")
@@ -0,0 +1,83 @@
+# End-to-end scraper throughput on a synthetic order PDF: pages/s, orders/s, rows/s and peak RSS
+# for page extraction, stitching, parsing and building the Orders frame. The run happens in a fresh
+# process so peak RSS belongs to the scrape alone.
+#
+#   python benchmarks/bench_scrape.py --orders 5000 --items 3 --break-every 7
+#   python benchmarks/bench_scrape.py --pdf big_export.pdf --workers 4 --shard-pages 200
+#   python benchmarks/bench_scrape.py --engine layout
+from contextlib import redirect_stdout
+from os import path
+import argparse
+import io
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from checkout import load_checkout, repo_dir
+from make_orders_pdf import write_orders_pdf
+
+
+def run_scrape(pdf_scrape, profile, file_path, workers, shard_pages, engine):
+    import fitz
+    # Checkouts from before the layout engine only take the default text engine
+    engine_options = {'engine': engine} if engine != 'text' else {}
+    with fitz.open(file_path) as doc:
+        page_count = doc.page_count
+    start = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        rows = pdf_scrape.scrape_files([file_path], profile, workers=workers, shard_pages=shard_pages,
+                                       **engine_options)
+        df = pdf_scrape.rows_to_frame(rows, profile)
+    elapsed = time.perf_counter() - start
+    # ru_maxrss is in KB on Linux; worker processes are counted separately
+    return {'pages': page_count, 'orders': int(df['order_number'].nunique()), 'rows': len(df),
+            'seconds': elapsed, 'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+            'children_peak_rss_mb': resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Scraper throughput and peak RSS on a synthetic order PDF.')
+    parser.add_argument('--checkout', default=repo_dir,
+                        help='checkout whose pdf_scrape package is benchmarked (default: this one)')
+    parser.add_argument('--store', default='v3_design', help='store profile to benchmark (default: v3_design)')
+    parser.add_argument('--engine', default='text', choices=['text', 'layout'],
+                        help='page parsing engine to benchmark (default: text)')
+    parser.add_argument('--pdf', help='benchmark this PDF instead of generating one')
+    parser.add_argument('--orders', type=int, default=2000, help='synthetic orders (default: 2000)')
+    parser.add_argument('--items', type=int, default=3, help='line items per synthetic order (default: 3)')
+    parser.add_argument('--break-every', type=int, default=7,
+                        help='force a continuation page break inside every Nth item (default: 7)')
+    parser.add_argument('--workers', type=int, default=1, help='scraper worker processes (default: 1)')
+    parser.add_argument('--shard-pages', type=int, default=0, help='pages per shard (default: 0, whole file)')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        pdf_scrape = load_checkout(args.checkout)
+        print(json.dumps(run_scrape(pdf_scrape, pdf_scrape.profiles[args.store], args.pdf,
+                                    args.workers, args.shard_pages, args.engine)))
+        sys.exit()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_path, item_count = args.pdf, None
+        if not file_path:
+            file_path = path.join(tmp_dir, 'synthetic orders.pdf')
+            _, item_count = write_orders_pdf(file_path, args.orders, args.items, args.break_every)
+        output = subprocess.run([sys.executable, __file__, '--child', '--checkout', args.checkout,
+                                 '--store', args.store, '--pdf', file_path, '--workers', str(args.workers),
+                                 '--shard-pages', str(args.shard_pages), '--engine', args.engine],
+                                check=True, capture_output=True, text=True).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    seconds = result['seconds']
+    if item_count is not None and result['rows'] != item_count:
+        # A throughput figure for a scrape that lost rows would only hide the loss
+        print(f"[ERROR]: {result['rows']} rows for the {item_count} items in the synthetic PDF")
+        sys.exit(1)
+    print(f"{args.store} {args.engine}: {result['pages']} pages, {result['orders']} orders, {result['rows']} rows "
+          f"in {seconds:.2f}s -> {result['pages'] / seconds:,.0f} pages/s, {result['orders'] / seconds:,.0f} orders/s, "
+          f"{result['rows'] / seconds:,.0f} rows/s")
+    print(f"peak RSS {result['peak_rss_mb']:.0f} MB"
+          + (f", workers {result['children_peak_rss_mb']:.0f} MB" if args.workers > 1 else ''))
@@ -0,0 +1,87 @@
+# Scrape service throughput: drives the ASGI app from pdf_scrape.service in-process, without a
+# server or network, with concurrent uploads of a synthetic export, and reports the status codes,
+# latency percentiles and uploads/s along with the service's own /metrics.
+#
+#   python benchmarks/bench_service.py --requests 16 --concurrency 4 --workers 2
+from os import path
+import argparse
+import asyncio
+import json
+import tempfile
+import time
+
+from checkout import load_checkout, repo_dir
+from make_orders_pdf import write_orders_pdf
+
+
+async def request(app, method, request_path, body=b'', query=''):
+    scope = {'type': 'http', 'method': method, 'path': request_path, 'query_string': query.encode(), 'headers': []}
+    messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+
+    async def receive():
+        return messages.pop(0) if messages else {'type': 'http.disconnect'}
+
+    response = {'status': None, 'body': b''}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            response['status'] = message['status']
+        else:
+            response['body'] += message.get('body', b'')
+
+    await app(scope, receive, send)
+    return response
+
+
+async def run_uploads(app, pdf_bytes, request_count, concurrency, query):
+    limit = asyncio.Semaphore(concurrency)
+    latencies, statuses = [], []
+
+    async def upload():
+        async with limit:
+            start = time.perf_counter()
+            response = await request(app, 'POST', '/scrape', pdf_bytes, query)
+            latencies.append(time.perf_counter() - start)
+            statuses.append(response['status'])
+
+    start = time.perf_counter()
+    await asyncio.gather(*(upload() for _ in range(request_count)))
+    return time.perf_counter() - start, sorted(latencies), statuses
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Scrape service latency and throughput, in-process.')
+    parser.add_argument('--checkout', default=repo_dir,
+                        help='checkout whose pdf_scrape package is benchmarked (default: this one)')
+    parser.add_argument('--pdf', help='upload this PDF instead of a generated one')
+    parser.add_argument('--orders', type=int, default=200, help='synthetic orders per upload (default: 200)')
+    parser.add_argument('--requests', type=int, default=16, help='uploads to send (default: 16)')
+    parser.add_argument('--concurrency', type=int, default=4, help='uploads in flight at once (default: 4)')
+    parser.add_argument('--workers', type=int, default=2, help='service worker processes (default: 2)')
+    parser.add_argument('--format', default='xlsx', choices=['xlsx', 'json'], help='response format (default: xlsx)')
+    args = parser.parse_args()
+
+    service = load_checkout(args.checkout, 'pdf_scrape.service')
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_path = args.pdf
+        if not file_path:
+            file_path = path.join(tmp_dir, 'synthetic orders.pdf')
+            write_orders_pdf(file_path, args.orders, 3, 7)
+        with open(file_path, 'rb') as f:
+            pdf_bytes = f.read()
+
+    app = service.ScrapeService(args.workers, max_pending=args.concurrency)
+    app.start()
+    try:
+        seconds, latencies, statuses = asyncio.run(
+            run_uploads(app, pdf_bytes, args.requests, args.concurrency, f'format={args.format}'))
+        metrics = json.loads(asyncio.run(request(app, 'GET', '/metrics'))['body'])
+    finally:
+        app.stop()
+
+    codes = ', '.join(f'{code} x{statuses.count(code)}' for code in sorted(set(statuses)))
+    print(f'{args.requests} uploads of {len(pdf_bytes) / 1024:,.0f} KB, {args.concurrency} at a time, '
+          f'{args.workers} worker(s): {codes}')
+    print(f'{args.requests / seconds:.1f} uploads/s, latency p50 {latencies[len(latencies) // 2] * 1000:.0f}ms, '
+          f'max {latencies[-1] * 1000:.0f}ms')
+    print('stages: ' + ', '.join(f'{name} {seconds:.2f}s' for name, seconds in metrics['stage_seconds'].items()))
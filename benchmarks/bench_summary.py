@@ -0,0 +1,72 @@
+# Times build_summaries() against the row-wise .apply version it replaced, on a synthetic
+# Orders frame, and checks that both produce the same tables.
+#
+#   python benchmarks/bench_summary.py --rows 1000000
+import argparse
+import re
+import time
+
+import numpy as np
+import pandas as pd
+
+from checkout import load_checkout, repo_dir
+
+
+def synthetic_frame(row_count, seed=0):
+    rng = np.random.default_rng(seed)
+    pick = lambda values: np.asarray(values, dtype=object)[rng.integers(0, len(values), row_count)]
+    order_numbers = np.char.add('ORD', (np.arange(row_count) // 3).astype(str)).astype(object)
+    return pd.DataFrame({
+        'order_number': order_numbers,
+        'Item': pick(['Classic Tee', 'Fleece Hoodie', 'Fleece Crewneck Sweatshirt', 'Shorts', 'Premium Sweatpants']),
+        'quantity': rng.integers(1, 4, row_count),
+        'size': pick(['S', 'M', 'L', 'XL', '2XL', 'YS', 'YM']),
+        'color': pick(['Jet Black', 'Military Green', 'Heather Grey', 'Whtie', 'Back', 'Sand Tan', 'Purple']),
+        'design': pick(['ORDNANCE', 'HELICOPTER', 'N/A']),
+        'Total Weight': rng.uniform(3, 25, row_count).round(1),
+        'email': order_numbers, 'Name': order_numbers, 'Street': '108 Somerset Street', 'City': 'New Brunswick',
+        'Zipcode': '08901', 'State': 'New Jersey', 'Phone': '+1 862-226-0785',
+    })
+
+
+def apply_summaries(df, size_order):
+    # The summary stage as it was written before build_summaries()
+    summary_df1 = pd.DataFrame()
+    summary_df1['Item'] = df['Item'].apply(lambda item: item.strip().split()[-1])
+    summary_df1[['quantity', 'Size', 'Design']] = df[['quantity', 'size', 'design']]
+    colors = r'(Black|Green|Grey|Brown|White|Whtie|Back|Tan|Red|Blue|Orange|Yellow)'
+    summary_df1['Color'] = df['color'].apply(lambda c: re.search(colors, c)[0] if re.search(colors, c) else c)
+    summary_df1['Color'] = summary_df1['Color'].replace({'Whtie': 'White', 'Back': 'Black'})
+    summary_df2 = summary_df1.groupby(['Item', 'Size', 'Color', 'Design']).sum()['quantity'].reset_index()
+    summary_df2['Size'] = pd.Categorical(summary_df2['Size'], categories=size_order, ordered=True)
+    summary_df2 = summary_df2.sort_values(['Item', 'Color', 'Size', 'Design'])
+    shipping_summary = df.groupby('order_number').agg({
+        'Total Weight': 'sum', 'email': 'first', 'Name': 'first', 'Street': 'first', 'City': 'first',
+        'Zipcode': 'first', 'State': 'first', 'Phone': 'first'
+    }).reset_index()
+    return summary_df1, summary_df2, shipping_summary
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the production/shipping summary stage.')
+    parser.add_argument('--checkout', default=repo_dir,
+                        help='checkout whose pdf_scrape package is benchmarked (default: this one)')
+    parser.add_argument('--rows', type=int, default=1000000, help='synthetic Orders rows (default: 1000000)')
+    args = parser.parse_args()
+
+    pdf_scrape = load_checkout(args.checkout)
+    profile = pdf_scrape.profiles['v3_design']
+    df = synthetic_frame(args.rows)
+    expected, apply_seconds = timed(apply_summaries, df, profile.size_order)
+    actual, vectorized_seconds = timed(pdf_scrape.build_summaries, df, profile)
+    for expected_table, actual_table in zip(expected, actual):
+        pd.testing.assert_frame_equal(expected_table, actual_table)
+
+    print(f'{args.rows} rows: apply {apply_seconds:.2f}s, vectorized {vectorized_seconds:.2f}s '
+          f'({apply_seconds / vectorized_seconds:.1f}x)')
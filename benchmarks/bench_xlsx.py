@@ -0,0 +1,72 @@
+# Compares the default pandas/openpyxl workbook path with the --stream-xlsx write-only path on
+# synthetic Orders rows. Each mode runs in a fresh process so peak RSS is measured separately.
+#
+#   python benchmarks/bench_xlsx.py --rows 100000
+from os import path
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from checkout import load_checkout, repo_dir
+
+
+def synthetic_rows(pdf_scrape, row_count):
+    sizes = ['S', 'M', 'L', 'XL', '2XL']
+    items = ['Classic Tee', 'Fleece Hoodie', 'Fleece Crewneck Sweatshirt', 'Shorts']
+    buyer = None
+    for i in range(row_count):
+        if i % 3 == 0:
+            # Three line items per order, sharing the order's buyer like get_order_data does
+            buyer = pdf_scrape.Buyer(f'Buyer {i // 3}', '108 Somerset Street', 'New Brunswick', 'New Jersey',
+                                     '08901', f'buyer{i // 3}@example.com', '+1 862-226-0785')
+        size = sizes[i % len(sizes)]
+        quantity = 1 + i % 3
+        yield pdf_scrape.LineItem(f'ORD{i // 3:06d}', items[i % len(items)], 20.0, quantity, 14.2,
+                                  f'Size: {size}\nColor: Jet Black\nDesign: ORDNANCE', size, 'Jet Black', 'ORDNANCE',
+                                  5.9, 5.9 * quantity, 5.8, 5.8 * quantity, 1.42, buyer)
+
+
+def run_mode(pdf_scrape, profile, mode, row_count, output_file_path):
+    import pandas as pd
+    start = time.perf_counter()
+    if mode == 'pandas':
+        df = pdf_scrape.rows_to_frame(synthetic_rows(pdf_scrape, row_count), profile)
+        with pd.ExcelWriter(output_file_path) as writer:
+            df.to_excel(writer, sheet_name='Orders', index=False)
+    else:
+        workbook = pdf_scrape.output.new_streaming_workbook()
+        pdf_scrape.output.stream_orders_sheet(workbook, synthetic_rows(pdf_scrape, row_count), profile)
+        workbook.save(output_file_path)
+    elapsed = time.perf_counter() - start
+    # ru_maxrss is in KB on Linux
+    return {'mode': mode, 'rows': row_count, 'seconds': elapsed,
+            'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Time and peak RSS of the Orders sheet xlsx writers.')
+    parser.add_argument('--checkout', default=repo_dir,
+                        help='checkout whose pdf_scrape package is benchmarked (default: this one)')
+    parser.add_argument('--store', default='v3_design', help='store profile to benchmark (default: v3_design)')
+    parser.add_argument('--rows', type=int, default=100000, help='synthetic Orders rows (default: 100000)')
+    parser.add_argument('--mode', choices=['pandas', 'stream'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        pdf_scrape = load_checkout(args.checkout)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            print(json.dumps(run_mode(pdf_scrape, pdf_scrape.profiles[args.store], args.mode, args.rows,
+                                      path.join(tmp_dir, 'bench.xlsx'))))
+        sys.exit()
+
+    for mode in ['pandas', 'stream']:
+        output = subprocess.run([sys.executable, __file__, '--checkout', args.checkout, '--store', args.store,
+                                 '--rows', str(args.rows), '--mode', mode],
+                                check=True, capture_output=True, text=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(f"{result['mode']:>7}: {result['rows']} rows in {result['seconds']:.2f}s, "
+              f"peak RSS {result['peak_rss_mb']:.0f} MB")
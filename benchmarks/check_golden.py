@@ -0,0 +1,205 @@
+# Golden-output regression check: scrapes the sample PDF in input/ and a synthetic order PDF that
+# hits every page continuation branch with both parsing engines, through the serial, sharded,
+# streaming, fast extraction and cached paths, and compares each workbook sheet by sheet with the
+# ones checked in under benchmarks/golden/; the synthetic workbooks must also hold one Orders row
+# per generated item. The in-memory sources scrape_orders() takes are checked against the same
+# PDFs read by path, overlapping exports of the sample must come out as the sample alone, and an
+# --orders run must give exactly those orders' golden rows.
+#
+#   python benchmarks/check_golden.py            # compare, exits 1 on any difference
+#   python benchmarks/check_golden.py --update   # rewrite the goldens after an intended change
+from contextlib import redirect_stdout
+from os import path
+import argparse
+import importlib
+import io
+import mmap
+import os
+import shutil
+import sys
+import tempfile
+
+import pandas as pd
+
+from checkout import load_checkout, repo_dir
+from make_orders_pdf import write_orders_pdf
+
+golden_dir = path.join(path.dirname(path.abspath(__file__)), 'golden')
+
+# Small enough to check in, large enough for every continuation kind to come up several times
+synthetic_options = {'orders': 30, 'items': 3, 'break_every': 2, 'seed': 0}
+
+# (input, profile, engine); with the text engine the older profiles can't parse the order cut by
+# the sample PDF's Design: page break and put it on the Rejects sheet, the layout engine reads it
+# with every profile
+cases = [(input_name, profile, engine) for engine in ['text', 'layout'] for input_name in ['sample', 'synthetic']
+         for profile in ['prime', 'sc3', 'yt', 'yt_v2', 'v3_design']]
+
+modes = {
+    'serial': ['--no-cache'],
+    'sharded': ['--no-cache', '--workers', '2', '--shard-pages', '2'],
+    'stream': ['--no-cache', '--stream-xlsx'],
+    'fast-extract': ['--no-cache', '--extract', 'fast'],
+    'cached': [],
+}
+
+
+def golden_name(input_name, profile, engine):
+    return f'{input_name}_{profile}.xlsx' if engine == 'text' else f'{input_name}_{profile}_{engine}.xlsx'
+
+
+def scrape_workbook(cli, input_dir, output_dir, profile, engine, mode, extra_args=()):
+    if path.exists(output_dir):
+        shutil.rmtree(output_dir)
+    os.makedirs(output_dir)
+    argv = (['--store', profile, '--engine', engine, '--input', input_dir, '--output', output_dir] + modes[mode]
+            + list(extra_args))
+    with redirect_stdout(io.StringIO()):
+        cli.main(argv)
+        if mode == 'cached':
+            # The second run reads every page back from the cache the first one filled
+            cli.main(argv)
+    return path.join(output_dir, 'Order details.xlsx')
+
+
+def memory_sources(file_path):
+    # The PDF as each kind of in-memory source scrape_orders() accepts
+    with open(file_path, 'rb') as f:
+        pdf_bytes = f.read()
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return {
+        'bytes': pdf_bytes,
+        'bytearray': bytearray(pdf_bytes),
+        'memoryview': memoryview(pdf_bytes),
+        'BytesIO': io.BytesIO(pdf_bytes),
+        'file object': open(file_path, 'rb'),
+        'mmap': mapped,
+    }
+
+
+def compare_sources(pdf_scrape, file_path, profile, engine):
+    with redirect_stdout(io.StringIO()):
+        expected = pdf_scrape.scrape_orders(file_path, profile, engine, as_frame=True)
+        differences = []
+        for kind, source in memory_sources(file_path).items():
+            try:
+                pd.testing.assert_frame_equal(pdf_scrape.scrape_orders(source, profile, engine, as_frame=True),
+                                              expected)
+            except AssertionError as e:
+                differences.append(f'{kind}: {str(e).splitlines()[0]}')
+    return differences
+
+
+def write_overlapping_exports(sample_dir, input_dir):
+    # The sample again under another name, which the row dedup drops, and under a name listing
+    # only orders the sample's name already lists, which the file prefilter skips
+    os.makedirs(input_dir)
+    sample_path = path.join(sample_dir, sorted(os.listdir(sample_dir))[0])
+    for file_name in [path.basename(sample_path), 'Reexport of orders.pdf', 'Orders - #PVD2D, #MQG4D.pdf']:
+        shutil.copy(sample_path, path.join(input_dir, file_name))
+    return input_dir
+
+
+# Orders on one page, across two pages and on the last page of the sample
+filtered_orders = ['MQG4D', '6UZSK', 'EDJY5']
+
+
+def compare_filtered(cli, input_dir, output_dir, engine, mode):
+    golden_path = path.join(golden_dir, golden_name('sample', 'v3_design', engine))
+    expected = pd.read_excel(golden_path, sheet_name='Orders')
+    expected = expected[expected['order_number'].isin(filtered_orders)].reset_index(drop=True)
+    workbook_path = scrape_workbook(cli, input_dir, output_dir, 'v3_design', engine, mode,
+                                    ['--orders'] + filtered_orders)
+    try:
+        # read_excel infers each column's dtype from the rows it reads, which differ for a subset
+        pd.testing.assert_frame_equal(pd.read_excel(workbook_path, sheet_name='Orders'), expected, check_dtype=False)
+    except AssertionError as e:
+        return [f'Orders: {str(e).splitlines()[0]}']
+    return []
+
+
+def compare_row_count(workbook_path, item_count):
+    # Every item the generator wrote must come out as one Orders row, or a golden written from a
+    # lossy scrape would pass from then on
+    orders = pd.read_excel(workbook_path, sheet_name=0)
+    return [] if len(orders) == item_count else [f'Orders: {len(orders)} rows for {item_count} generated items']
+
+
+def compare_workbooks(expected_path, actual_path):
+    expected = pd.read_excel(expected_path, sheet_name=None)
+    actual = pd.read_excel(actual_path, sheet_name=None)
+    if list(expected) != list(actual):
+        return [f'sheets {list(actual)} != {list(expected)}']
+    differences = []
+    for sheet_name in expected:
+        try:
+            pd.testing.assert_frame_equal(actual[sheet_name], expected[sheet_name])
+        except AssertionError as e:
+            differences.append(f'{sheet_name}: {str(e).splitlines()[0]}')
+    return differences
+
+
+def report(label, differences):
+    # Prints one check's result and returns 1 if it failed, for the failure count
+    print(f"{'[FAIL]' if differences else '[OK]'}: {label}")
+    for difference in differences:
+        print(f'    {difference}')
+    return int(bool(differences))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare scraper workbooks against the checked-in goldens.')
+    parser.add_argument('--checkout', default=repo_dir,
+                        help='checkout whose pdf_scrape package is checked (default: this one)')
+    parser.add_argument('--update', action='store_true', help='rewrite the golden workbooks from the serial run')
+    args = parser.parse_args()
+
+    cli = load_checkout(args.checkout, 'pdf_scrape.cli')
+    failures = 0
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        input_dirs = {'sample': path.join(repo_dir, 'input'), 'synthetic': path.join(tmp_dir, 'synthetic')}
+        os.makedirs(input_dirs['synthetic'])
+        _, item_count = write_orders_pdf(path.join(input_dirs['synthetic'], 'synthetic orders.pdf'),
+                                         **synthetic_options)
+
+        for input_name, profile, engine in cases:
+            golden_path = path.join(golden_dir, golden_name(input_name, profile, engine))
+            output_dir = path.join(tmp_dir, 'Output')
+            if args.update:
+                workbook_path = scrape_workbook(cli, input_dirs[input_name], output_dir, profile, engine, 'serial')
+                differences = compare_row_count(workbook_path, item_count) if input_name == 'synthetic' else []
+                if differences:
+                    failures += report(f'{input_name} {profile} {engine} not updated', differences)
+                    continue
+                os.makedirs(golden_dir, exist_ok=True)
+                shutil.copy(workbook_path, golden_path)
+                print(f'[Updated]: {path.basename(golden_path)}')
+                continue
+            for mode in modes:
+                workbook_path = scrape_workbook(cli, input_dirs[input_name], output_dir, profile, engine, mode)
+                differences = compare_workbooks(golden_path, workbook_path)
+                if input_name == 'synthetic':
+                    differences += compare_row_count(workbook_path, item_count)
+                failures += report(f'{input_name} {profile} {engine} {mode}', differences)
+
+        if not args.update:
+            pdf_scrape = importlib.import_module('pdf_scrape')
+            for input_name in input_dirs:
+                file_path = path.join(input_dirs[input_name], sorted(os.listdir(input_dirs[input_name]))[0])
+                for engine in ['text', 'layout']:
+                    differences = compare_sources(pdf_scrape, file_path, 'v3_design', engine)
+                    failures += report(f'{input_name} v3_design {engine} in-memory sources', differences)
+
+            overlap_dir = write_overlapping_exports(input_dirs['sample'], path.join(tmp_dir, 'overlap'))
+            for mode in ['serial', 'sharded']:
+                differences = compare_workbooks(
+                    path.join(golden_dir, golden_name('sample', 'v3_design', 'text')),
+                    scrape_workbook(cli, overlap_dir, path.join(tmp_dir, 'Output'), 'v3_design', 'text', mode))
+                failures += report(f'overlapping exports v3_design text {mode}', differences)
+
+            for engine in ['text', 'layout']:
+                for mode in ['serial', 'sharded', 'cached']:
+                    differences = compare_filtered(cli, input_dirs['sample'], path.join(tmp_dir, 'Output'), engine, mode)
+                    failures += report(f'--orders sample v3_design {engine} {mode}', differences)
+
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,71 @@
+# Cold-start budget check: the scripts' --help must come back without importing pandas or PyMuPDF
+# and within a wall-time budget, since automation runs the scraper once per file. Each run is a
+# fresh interpreter; the slowest imports are listed from `python -X importtime`.
+#
+#   python benchmarks/check_startup.py                   # exits 1 if over budget
+#   python benchmarks/check_startup.py --budget-ms 120
+from os import path
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+repo_dir = path.dirname(path.dirname(path.abspath(__file__)))
+
+# Only the stages that extract pages or build tables may import these
+heavy_modules = ['fitz', 'pymupdf', 'pandas', 'numpy', 'openpyxl', 'pyarrow']
+
+
+def import_times(checkout_dir, module):
+    # Returns {module: cumulative microseconds} for one cold import of module
+    env = dict(os.environ, PYTHONPATH=checkout_dir)
+    stderr = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            env=env, capture_output=True, text=True, check=True).stderr
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def help_seconds(checkout_dir, repeat):
+    # Best of repeat runs of the V3 script's --help, the cheapest full trip through the CLI
+    script = path.join(checkout_dir, 'PDF_Yt_V3_design.py')
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, script, '--help'], capture_output=True, check=True)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Check the scraper CLI cold start against a time budget.')
+    parser.add_argument('--checkout', default=repo_dir,
+                        help='checkout whose pdf_scrape package is checked (default: this one)')
+    parser.add_argument('--budget-ms', type=float, default=150,
+                        help='wall-time budget for --help, interpreter start included (default: 150)')
+    parser.add_argument('--repeat', type=int, default=5, help='--help runs, the best one counts (default: 5)')
+    parser.add_argument('--top', type=int, default=8, help='slowest imports to list (default: 8)')
+    args = parser.parse_args()
+
+    times = import_times(args.checkout, 'pdf_scrape.cli')
+    print(f"pdf_scrape.cli imports in {times['pdf_scrape.cli'] / 1000:.1f}ms; slowest:")
+    for name, cumulative in sorted(times.items(), key=lambda item: -item[1])[1:args.top + 1]:
+        print(f'    {cumulative / 1000:8.1f}ms  {name}')
+
+    failures = 0
+    imported = [name for name in heavy_modules if name in times]
+    print(f"{'[FAIL]' if imported else '[OK]'}: heavy imports at startup: {', '.join(imported) or 'none'}")
+    failures += bool(imported)
+
+    seconds = help_seconds(args.checkout, args.repeat)
+    over = seconds * 1000 > args.budget_ms
+    print(f"{'[FAIL]' if over else '[OK]'}: --help in {seconds * 1000:.0f}ms (budget {args.budget_ms:g}ms)")
+    failures += over
+
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,12 @@
+# Shared by the benchmark and check scripts: imports pdf_scrape from a given checkout, so another
+# version can be benchmarked or checked the same way as this one
+from os import path
+import importlib
+import sys
+
+repo_dir = path.dirname(path.dirname(path.abspath(__file__)))
+
+
+def load_checkout(checkout_dir, module='pdf_scrape'):
+    sys.path.insert(0, checkout_dir)
+    return importlib.import_module(module)
@@ -0,0 +1,145 @@
+# Writes a synthetic order PDF laid out like the store exports in input/: every order starts a
+# page with the store header, no page-number header, and each field positioned where the exports
+# put it (item name, quantity and price on one row, the options below the name). The lines are
+# written in the exports' text order, so both parsing engines read the same orders. --break-every
+# forces a page break inside every Nth item, cycling through the Color:, Size: and SKU
+# continuations that the page loop stitches back together.
+#
+#   python benchmarks/make_orders_pdf.py synthetic.pdf --orders 1000 --items 3 --break-every 5
+import argparse
+import random
+
+import fitz
+
+store_header = [
+    'ORDNANCE MERCH', 'ordnance.company.site', 'Tax registration ID', 'VisuallyPaired', '108 Somerset Street',
+    'New Brunswick, New Jersey 08901', 'United States', 'Customer service', '+1 862-226-0785',
+    'contact@visuallypaired.com',
+]
+products = [
+    ('Classic Tee', '000T', 20.0), ('Fleece Hoodie', '000H', 40.0), ('Fleece Crewneck Sweatshirt', '000S', 35.0),
+    ('Premium Sweatpants', '00SP', 38.0), ('Shorts', '00SS', 27.5),
+]
+sizes = ['S', 'M', 'L', 'XL', '2XL']
+colors = ['Jet Black', 'Military Green', 'Heather Grey']
+designs = ['ORDNANCE', 'HELICOPTER']
+cities = [('San Diego', 'California', '92123'), ('Whittier', 'California', '90605'), ('Austin', 'Texas', '78701')]
+break_kinds = ['color', 'size', 'sku']
+
+# Columns and rows in points, as measured on the sample export
+name_x, quantity_x, price_x, label_x = 117, 396, 451, 370
+service_x, shipping_x, thanks_x = 378.6, 250.2, 252.7
+top, row_height, page_bottom = 170, 12, 760
+rows_per_page = (page_bottom - top) // row_height
+
+
+def order_number(order_index):
+    digits = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+    number = ''
+    for _ in range(5):
+        order_index, digit = divmod(order_index, len(digits))
+        number = digits[digit] + number
+    return number
+
+
+def column(x, lines, first_row=0):
+    return [(x, first_row + row, line) for row, line in enumerate(lines)]
+
+
+def item_lines(rng, break_kind=None):
+    # Returns the item's line total and its (x, row, text) lines before and after a forced page
+    # break; quantity and price share the name's row and come last, like in the exports
+    name, sku, price = rng.choice(products)
+    quantity = rng.randint(1, 3)
+    name_lines = [name]
+    sku_lines = [f'SKU\xa0: {sku}']   # a no-break space, as in the exports
+    size_lines = [f'Size: {rng.choice(sizes)}']
+    color_lines = [f'Color: {rng.choice(colors)}']
+    if name != 'Shorts':
+        color_lines.append(f'Design: {rng.choice(designs)}')
+    price_lines = [(quantity_x, 0, str(quantity)), (price_x, 0, f'${price:.2f}')]
+    if break_kind == 'color':
+        before, after = name_lines + sku_lines + size_lines, color_lines
+    elif break_kind == 'size':
+        before, after = name_lines + sku_lines, size_lines + color_lines
+    elif break_kind == 'sku':
+        before, after = name_lines, sku_lines + size_lines + color_lines
+    else:
+        before, after = name_lines + sku_lines + size_lines + color_lines, []
+    return price * quantity, column(name_x, before) + price_lines, column(name_x, after)
+
+
+def order_blocks(rng, order_index, item_count, break_every, item_counter):
+    # Yields the order as blocks of (x, row, text) lines that are kept on one page; None forces a
+    # page break
+    city, state, zipcode = rng.choice(cities)
+    buyer_lines = [
+        f'Jul {rng.randint(1, 28)}, 2024, {rng.randint(1, 12):02d}:{rng.randint(0, 59):02d} PM', '',
+        f'Buyer {order_index}', f'{rng.randint(10, 9999)} Kearny Villa Ln', f'{city}, {state} {zipcode}',
+        'United States', f'+1 {rng.randint(200, 999)}-{rng.randint(200, 999)}-{rng.randint(1000, 9999)}',
+        f'buyer{order_index}@example.com', '', '', f'Order #{order_number(order_index)}',
+    ]
+    yield (column(name_x, store_header[:7]) + column(service_x, store_header[7:], 1)
+           + column(name_x, buyer_lines[:-3], 9) + column(shipping_x, ['Shipped via UPS Ground',
+                                                                  'Payment method Credit or debit', 'card'], 11)
+           + column(name_x, buyer_lines[-3:], 17))
+    items_total = 0
+    for _ in range(item_count):
+        item_counter[0] += 1
+        break_kind = None
+        if break_every and item_counter[0] % break_every == 0:
+            break_kind = break_kinds[item_counter[0] // break_every % len(break_kinds)]
+        line_total, before, after = item_lines(rng, break_kind)
+        items_total += line_total
+        yield before
+        if after:
+            yield None
+            yield after
+    yield [(label_x, 0, 'Items'), (price_x, 0, f'${items_total:.2f}'), (label_x, 1, 'Shipping'),
+           (price_x, 1, '$16.00'), (label_x, 2, 'Total'), (price_x, 2, f'${items_total + 16:.2f}'),
+           (thanks_x, 5, 'Thank you for your order!')]
+
+
+def write_orders_pdf(file_path, orders=100, items=3, break_every=0, seed=0):
+    # Returns the page count and the number of line items written, which is the number of Orders
+    # rows a scrape of the PDF must give
+    rng = random.Random(seed)
+    item_counter = [0]
+    pages = []
+    for order_index in range(orders):
+        pages.append([])
+        used_rows = 0
+        for block in order_blocks(rng, order_index, items, break_every, item_counter):
+            block_rows = max(row for _, row, _ in block) + 2 if block else 0   # one blank row after a block
+            if block is None or used_rows + block_rows > rows_per_page:
+                pages.append([])
+                used_rows = 0
+            if block:
+                pages[-1] += [(x, used_rows + row, text) for x, row, text in block if text]
+                used_rows += block_rows
+
+    font = fitz.Font('helv')
+    with fitz.open() as doc:
+        for lines in pages:
+            page = doc.new_page(width=612, height=792)
+            writer = fitz.TextWriter(page.rect)
+            for x, row, text in lines:
+                writer.append((x, top + row * row_height), text, font=font, fontsize=10)
+            writer.write_text(page)
+        doc.save(file_path, garbage=3, deflate=True)
+    return len(pages), item_counter[0]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Write a synthetic order PDF for benchmarks and golden checks.')
+    parser.add_argument('file_path', help='PDF to write')
+    parser.add_argument('--orders', type=int, default=100, help='number of orders (default: 100)')
+    parser.add_argument('--items', type=int, default=3, help='line items per order (default: 3)')
+    parser.add_argument('--break-every', type=int, default=0,
+                        help='force a page break inside every Nth item, cycling Color:/Size:/SKU '
+                             'continuations (default: 0, never)')
+    parser.add_argument('--seed', type=int, default=0, help='random seed (default: 0)')
+    args = parser.parse_args()
+
+    page_count, item_count = write_orders_pdf(args.file_path, args.orders, args.items, args.break_every, args.seed)
+    print(f'{args.file_path}: {args.orders} orders, {item_count} items, {page_count} pages')
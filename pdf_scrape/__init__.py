@@ -0,0 +1,33 @@
+from importlib import import_module
+
+from .parse import Buyer, LineItem, get_order_data
+from .profiles import Profile, default_profile, profiles
+
+# Everything else pulls in PyMuPDF or pandas, so it is only imported on first use and
+# `import pdf_scrape` (or the scripts' --help) doesn't pay for either
+lazy_exports = {
+    'PageCache': 'cache',
+    'iter_orders': 'extract',
+    'iter_page_texts': 'extract',
+    'build_summaries': 'frames',
+    'build_tables': 'frames',
+    'rows_to_frame': 'frames',
+    'OrderIndex': 'index',
+    'iter_layout_orders': 'layout',
+    'iter_page_lines': 'layout',
+    'write_outputs': 'output',
+    'ScanIndex': 'scan',
+    'scan_pdf': 'scan',
+    'engines': 'scrape',
+    'iter_rows': 'scrape',
+    'scrape_files': 'scrape',
+    'scrape_orders': 'scrape',
+}
+
+
+def __getattr__(name):
+    if name in lazy_exports:
+        return getattr(import_module(f'.{lazy_exports[name]}', __name__), name)
+    if name in lazy_exports.values():
+        return import_module(f'.{name}', __name__)
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
@@ -0,0 +1,88 @@
+from os import path
+import hashlib
+import os
+import sqlite3
+import time
+import zlib
+
+import fitz
+
+
+def file_sha256(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def create_file_hashes(conn, table='files'):
+    conn.execute(f'CREATE TABLE IF NOT EXISTS {table} (path TEXT PRIMARY KEY, size INTEGER, mtime REAL, sha256 TEXT)')
+
+
+def stored_file_hash(conn, file_path, table='files'):
+    # The file's SHA-256, kept in the table create_file_hashes() made and re-hashed only when the
+    # file's size or mtime changed since it was last seen
+    stat = os.stat(file_path)
+    file_key = path.abspath(file_path)
+    row = conn.execute(f'SELECT size, mtime, sha256 FROM {table} WHERE path = ?', (file_key,)).fetchone()
+    if row and row[0] == stat.st_size and row[1] == stat.st_mtime:
+        return row[2]
+    pdf_hash = file_sha256(file_path)
+    conn.execute(f'INSERT OR REPLACE INTO {table} VALUES (?, ?, ?, ?)',
+                 (file_key, stat.st_size, stat.st_mtime, pdf_hash))
+    conn.commit()
+    return pdf_hash
+
+
+class PageCache:
+    # On-disk cache of extracted page text keyed by PDF SHA-256, page index, PyMuPDF version and
+    # extraction options, so re-runs after a pricing tweak skip page.get_text(). Pages are stored
+    # zlib-compressed and evict() drops the least recently used pages once the cache grows past
+    # its size limit.
+    def __init__(self, cache_path, extract_key=''):
+        # extract_key tells apart text extracted with other flags or clipping, see extract.extract_key()
+        self.version = fitz.VersionBind + extract_key
+        self.conn = sqlite3.connect(cache_path, timeout=60)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        create_file_hashes(self.conn)
+        self.conn.execute('CREATE TABLE IF NOT EXISTS pages '
+                          '(sha256 TEXT, page_index INTEGER, fitz_version TEXT, text BLOB, size INTEGER, '
+                          'last_used REAL, PRIMARY KEY (sha256, page_index, fitz_version))')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS pages_last_used ON pages (last_used)')
+        self.used = []
+
+    def file_hash(self, file_path):
+        return stored_file_hash(self.conn, file_path)
+
+    def get(self, pdf_hash, page_index):
+        row = self.conn.execute('SELECT text FROM pages WHERE sha256 = ? AND page_index = ? AND fitz_version = ?',
+                                (pdf_hash, page_index, self.version)).fetchone()
+        if row is None:
+            return None
+        self.used.append((pdf_hash, page_index))
+        return zlib.decompress(row[0]).decode('utf-8')
+
+    def put(self, pdf_hash, page_index, page_text):
+        blob = zlib.compress(page_text.encode('utf-8'))
+        self.conn.execute('INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?)',
+                          (pdf_hash, page_index, self.version, blob, len(blob), time.time()))
+
+    def evict(self, max_bytes):
+        total = self.conn.execute('SELECT COALESCE(SUM(size), 0) FROM pages').fetchone()[0]
+        evicted = []
+        for rowid, size in self.conn.execute('SELECT rowid, size FROM pages ORDER BY last_used'):
+            if total <= max_bytes:
+                break
+            evicted.append((rowid,))
+            total -= size
+        self.conn.executemany('DELETE FROM pages WHERE rowid = ?', evicted)
+        self.conn.commit()
+        return len(evicted)
+
+    def close(self):
+        now = time.time()
+        self.conn.executemany('UPDATE pages SET last_used = ? WHERE sha256 = ? AND page_index = ? AND fitz_version = ?',
+                              [(now, pdf_hash, page_index, self.version) for pdf_hash, page_index in self.used])
+        self.conn.commit()
+        self.conn.close()
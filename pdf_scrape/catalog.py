@@ -0,0 +1,113 @@
+from collections import namedtuple
+from os import path
+import csv
+import json
+import re
+
+from .stats import stats, warn
+
+catalog_dir = path.join(path.dirname(path.abspath(__file__)), 'catalogs')
+
+# What a line item's name and size are worth; 'Other' and zeros when the catalog doesn't know it
+Product = namedtuple('Product', ['item_type', 'cost', 'weight', 'donation'])
+
+
+# Name prefixes fuzzy profiles skip to take the next word as the item type, e.g. 'Fleece Crewneck ...'
+default_fuzzy_prefixes = ('Classic', 'Premium', 'Fleece')
+
+
+class TypeMatcher:
+    # All product types in one precompiled alternation; the lookahead also finds types overlapping
+    # each other, so the first type in priority order wins, not the one leftmost in the name
+    def __init__(self, types):
+        self.types = types
+        self.ranks = {item_type: rank for rank, item_type in enumerate(types)}
+        alternation = '|'.join(sorted(map(re.escape, types), key=len, reverse=True))
+        self.pattern = re.compile(f'(?=({alternation}))')
+
+    def rank(self, text):
+        found = self.pattern.findall(text)
+        return min(self.ranks[item_type] for item_type in found) if found else None
+
+    def first(self, text):
+        rank = self.rank(text)
+        return None if rank is None else self.types[rank]
+
+
+class Catalog:
+    # A store's products, loaded from a JSON or CSV file in catalogs/ (or anywhere with --catalog).
+    # Products are listed in match priority: an item name is classified as the first product type
+    # it contains, which the old if-chains did with one substring test per type and row. Here all
+    # types are found in one pass of a precompiled alternation, and each distinct (name, size) is
+    # only classified once.
+    def __init__(self, products, fuzzy_prefixes=default_fuzzy_prefixes, source=None):
+        self.source = source
+        self.types = [product['type'] for product in products]
+        self.costs = {product['type']: product['cost'] for product in products}
+        self.donations = {product['type']: product['donation'] for product in products}
+        self.weights = {product['type']: product.get('weights', {}) for product in products}
+        self.fuzzy_prefixes = set(fuzzy_prefixes)
+        self.type_matcher = TypeMatcher(self.types)
+        self.lower_type_matcher = TypeMatcher([item_type.lower() for item_type in self.types])
+        self.memo = {}
+
+    def classify(self, item_name, fuzzy):
+        # Returns (item type, cost type, known). The cost always goes by a case-sensitive match, the
+        # item type by a case-insensitive one with a first-word fallback on fuzzy profiles.
+        cost_type = self.type_matcher.first(item_name)
+        if not fuzzy:
+            return cost_type or 'Other', cost_type, True
+        rank = self.lower_type_matcher.rank(item_name.lower())
+        if rank is not None:
+            return self.types[rank], cost_type, True
+        words = item_name.split()
+        if words[0] in self.fuzzy_prefixes:
+            return words[1] if len(words) > 1 else '', cost_type, True
+        return 'Other', cost_type, False
+
+    def lookup(self, item_name, item_size, fuzzy=True):
+        key = (item_name, item_size, fuzzy)
+        entry = self.memo.get(key)
+        if entry is None:
+            stats.count('catalog_misses')
+            item_type, cost_type, known = self.classify(item_name, fuzzy)
+            product = Product(item_type, self.costs.get(cost_type),
+                              self.weights.get(item_type, {}).get(item_size, 0), self.donations.get(item_type, 0))
+            entry = self.memo[key] = (product, known)
+        product, known = entry
+        if not known:
+            warn('unknown_item_type', f"Warning: Unknown item type for '{item_name}'. Setting to 'Other'.")
+        return product
+
+
+def read_products_csv(file_path):
+    # One row per product and size: type,cost,donation,size,weight; a product without sizes has
+    # one row with size and weight left empty
+    products = {}
+    with open(file_path, newline='') as f:
+        for row in csv.DictReader(f):
+            product = products.setdefault(row['type'], {'type': row['type'], 'cost': float(row['cost']),
+                                                        'donation': float(row['donation']), 'weights': {}})
+            if row.get('size'):
+                product['weights'][row['size']] = float(row['weight'])
+    return list(products.values())
+
+
+loaded_catalogs = {}
+
+
+def load_catalog(name_or_path):
+    # A built-in catalog by name (catalogs/<name>.json) or a .json/.csv file; each file is loaded once
+    file_path = name_or_path
+    if not file_path.endswith(('.json', '.csv')):
+        file_path = path.join(catalog_dir, f'{name_or_path}.json')
+    file_path = path.abspath(file_path)
+    if file_path not in loaded_catalogs:
+        if file_path.endswith('.csv'):
+            loaded_catalogs[file_path] = Catalog(read_products_csv(file_path), source=file_path)
+        else:
+            with open(file_path) as f:
+                data = json.load(f)
+            loaded_catalogs[file_path] = Catalog(data['products'], data.get('fuzzy_prefixes', default_fuzzy_prefixes),
+                                                 source=file_path)
+    return loaded_catalogs[file_path]
@@ -0,0 +1,305 @@
+from datetime import datetime
+from os import path
+import argparse
+import copy
+import json
+import os
+import time
+
+from .catalog import load_catalog
+from .profiles import default_profile, profiles
+from .stats import stats
+from .watch import watch_folder
+
+# PyMuPDF and pandas are imported by the stages that need them rather than up here, so --help
+# and argument errors come back without paying for either (see benchmarks/check_startup.py)
+
+
+def run(args, file_paths=None):
+    profile = profiles[args.store]
+    if args.catalog or args.strict:
+        profile = copy.copy(profile)
+    if args.catalog:
+        profile.catalog = load_catalog(args.catalog)
+    if args.strict:
+        # Orders the store would fill in with Unknown values are quarantined with the rejects instead
+        profile.lenient = False
+    stats.reset()
+    start_time = time.perf_counter()
+
+    if not os.path.exists(args.input):
+        print(f'[ERROR]: {args.input} folder missing!!')
+        return
+    if file_paths is None:
+        files = sorted(f for f in os.listdir(args.input) if f.endswith('.pdf'))
+        file_paths = [path.join(args.input, f_name) for f_name in files]
+    cache_path = None if args.no_cache else args.cache or path.join(args.output, 'page_cache.sqlite')
+    dataset_path = args.dataset or path.join(args.output, 'orders_dataset.pkl')
+
+    known_orders = None
+    if args.incremental:
+        from .index import OrderIndex
+        order_index = OrderIndex(args.index or path.join(args.output, 'order_index.sqlite'))
+        file_paths = [file_path for file_path in file_paths if not order_index.is_processed(file_path)]
+        known_orders = order_index.known_orders()
+        print(f'[Incremental]: {len(file_paths)} new file(s), {len(known_orders)} order(s) already processed')
+
+    from .extract import ExtractOptions
+    from .index import OrderDedup
+    from .scrape import scrape_files
+    dedup = None
+    if not args.keep_duplicates:
+        dedup = OrderDedup(known_orders or ())
+        file_paths = dedup.prefilter(file_paths)
+    extract_options = ExtractOptions(args.extract == 'fast', args.clip_top)
+    page_ranges = None
+    if args.scan or args.orders or args.since:
+        page_ranges = scan_files(args, file_paths, cache_path, extract_options)
+        if args.scan:
+            return
+        file_paths = [file_path for file_path in file_paths if file_path in page_ranges]
+    rows = scrape_files(file_paths, profile, workers=args.workers, shard_pages=args.shard_pages,
+                        cache_path=cache_path, known_orders=known_orders, extract_options=extract_options,
+                        engine=args.engine, dedup=dedup, page_ranges=page_ranges)
+    # Streaming straight from the scraper only works when nothing else needs the full Orders frame
+    stream_orders = args.stream_xlsx and args.format == ['xlsx'] and not args.incremental
+    from .frames import build_tables, rows_to_frame
+    from .output import (append_sheets, new_streaming_workbook, rejects_table, stream_orders_sheet, workbook_layout,
+                         write_outputs, write_rejects)
+    if stream_orders:
+        workbook = new_streaming_workbook()
+        with stats.stage('orders_sheet'):
+            df = stream_orders_sheet(workbook, rows, profile)
+    else:
+        with stats.stage('frame'):
+            df = rows_to_frame(rows, profile)
+
+    if args.incremental:
+        import pandas as pd
+        with stats.stage('incremental'):
+            new_orders = df['order_number'].unique() if len(df) else []
+            if os.path.exists(dataset_path):
+                df = pd.concat([pd.read_pickle(dataset_path), df], ignore_index=True)
+            df.to_pickle(dataset_path)
+            # Record the files only once their rows are safely in the dataset, and only when all of
+            # their pages were scraped rather than the ones --orders or --since picked
+            order_index.add(file_paths if page_ranges is None else [], new_orders)
+            order_index.close()
+        print(f'[Incremental]: added {len(new_orders)} order(s), dataset now has {len(df)} rows')
+    if cache_path:
+        from .cache import PageCache
+        with stats.stage('cache'):
+            cache = PageCache(cache_path)
+            cache.evict(args.cache_size * 1024 * 1024)
+            cache.close()
+    if dedup:
+        stats.rejects = dedup.unique_rejects(stats.rejects)
+    with stats.stage('summaries'):
+        tables = build_tables(df, profile)
+        if stats.rejects:
+            tables['Rejects'] = rejects_table(stats.rejects)
+
+    with stats.stage('write'):
+        # Written before the workbook, so the rejects are kept even if saving it fails; incremental
+        # runs keep the rejects of earlier batches, like the dataset keeps their rows
+        rejects_path = args.rejects or path.join(args.output, 'rejects.jsonl')
+        write_rejects(stats.rejects, rejects_path, append=args.incremental)
+        if stream_orders:
+            output_file_path = path.join(args.output, 'Order details.xlsx')
+            append_sheets(workbook, tables, workbook_layout(tables, profile)[1:])
+            workbook.save(output_file_path)
+            saved = [output_file_path]
+        else:
+            saved = write_outputs(tables, args.format, args.output, profile, stream_xlsx=args.stream_xlsx)
+    for output_path in saved:
+        print(f'\nData saved in {output_path}')
+    if stats.counters['duplicate_orders']:
+        print(f"[Dedup]: dropped {stats.counters['duplicate_orders']} repeated order(s), "
+              f"{stats.counters['duplicate_rows']} row(s)")
+    rejected = sum(reject['status'] == 'rejected' for reject in stats.rejects)
+    if rejected:
+        print(f'[Rejects]: {rejected} order(s) could not be parsed, see {rejects_path}')
+    if len(stats.rejects) > rejected:
+        print(f'[Kept]: {len(stats.rejects) - rejected} order(s) were filled in with fallback values, '
+              f'see {rejects_path}')
+
+    write_report(args, len(file_paths), len(df), time.perf_counter() - start_time)
+    print()
+
+
+def scan_files(args, file_paths, cache_path, extract_options):
+    # Looks up (or scans for) where each file's orders are and returns the page ranges holding the
+    # ones --orders and --since ask for, {file path: [(start, stop), ...]}
+    from .scan import ScanIndex, select_spans, span_page_ranges
+    scan_index = ScanIndex(args.scan_index or path.join(args.output, 'scan_index.sqlite'))
+    order_numbers = {order_number.lstrip('#') for order_number in args.orders or []}
+    page_ranges, found, page_count = {}, set(), 0
+    for file_path in file_paths:
+        spans = scan_index.spans(file_path, cache_path, extract_options)
+        if args.scan:
+            dates = sorted(span.order_date for span in spans if span.order_date)
+            date_range = f', {dates[0][:10]} to {dates[-1][:10]}' if dates else ''
+            print(f'[Scan]: {path.basename(file_path)}\t{len(spans)} order(s) on '
+                  f'{spans[-1].stop if spans else 0} page(s){date_range}')
+        selected = select_spans(spans, order_numbers, args.since)
+        if selected:
+            page_ranges[file_path] = span_page_ranges(selected)
+            found.update(span.order_number for span in selected)
+            page_count += sum(span.stop - span.start for span in selected)
+    scan_index.close()
+    if not args.scan:
+        print(f'[Scan]: {len(found)} order(s) on {page_count} page(s) of {len(page_ranges)} file(s) selected')
+    if order_numbers - found:
+        print(f"[Scan]: order(s) not found: {', '.join(sorted(order_numbers - found))}")
+    return page_ranges
+
+
+def since_date(value):
+    # --since takes a date or a date and time, compared with the orders' dates as ISO text
+    return datetime.fromisoformat(value).isoformat(timespec='minutes')
+
+
+def write_report(args, file_count, row_count, wall_seconds):
+    # Stage seconds are summed over the worker processes, so with --workers they can add up to
+    # more than the wall time; the main process's wait for shard results counts under frame
+    report_path = args.report or path.join(args.output, 'run_report.json')
+    report = {
+        'started': datetime.fromtimestamp(time.time() - wall_seconds).isoformat(timespec='seconds'),
+        'store': args.store,
+        'files': file_count,
+        'rows': row_count,
+        'workers': args.workers,
+        'shard_pages': args.shard_pages,
+        'engine': args.engine,
+        'extract': args.extract,
+        'wall_seconds': round(wall_seconds, 4),
+        'stage_seconds': {name: round(seconds, 4) for name, seconds in
+                          sorted(stats.seconds.items(), key=lambda item: -item[1])},
+        'counters': dict(sorted(stats.counters.items())),
+    }
+    with open(report_path, 'w') as f:
+        json.dump(report, f, indent=2)
+    stages = ', '.join(f'{name} {seconds:.2f}s' for name, seconds in report['stage_seconds'].items())
+    print(f'[Stages]: {stages}')
+    print(f'[Report]: {report_path}')
+
+
+def run_watch(args):
+    # Stays running with the imports warm; each batch of new PDFs is scraped incrementally into the
+    # saved dataset and the summaries and outputs are rebuilt from it
+    if not os.path.exists(args.input):
+        print(f'[ERROR]: {args.input} folder missing!!')
+        return
+    args.incremental = True
+    watch_folder(args.input, lambda file_paths: run(args, file_paths), args.poll, args.debounce)
+
+
+def run_profiled(args):
+    # Profiles the main process only; with --workers the shard scraping happens in the workers
+    profile_path = args.profile_output or path.join(
+        args.output, 'run_profile.html' if args.profile == 'pyinstrument' else 'run_profile.prof')
+    if args.profile == 'pyinstrument':
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            print('[ERROR]: --profile pyinstrument needs pyinstrument installed, running without profiling')
+            return run(args)
+        profiler = Profiler()
+        profiler.start()
+        try:
+            run(args)
+        finally:
+            profiler.stop()
+            with open(profile_path, 'w') as f:
+                f.write(profiler.output_html())
+    else:
+        import cProfile
+        profiler = cProfile.Profile()
+        try:
+            profiler.runcall(run, args)
+        finally:
+            profiler.dump_stats(profile_path)
+    print(f'[Profile]: {profile_path}\n')
+
+
+def main(argv=None, profile_name=default_profile):
+    parser = argparse.ArgumentParser(description='Scrape order PDFs from the Input folder into an Excel workbook.')
+    parser.add_argument('--store', default=profile_name, choices=sorted(profiles),
+                        help=f'store profile: weights, colours, parsing rules and sheet layout (default: {profile_name})')
+    parser.add_argument('--catalog', help='product catalog (.json or .csv, or a built-in name like youth) '
+                                          'used instead of the store\'s own')
+    parser.add_argument('--input', default='Input', help='folder the order PDFs are read from (default: Input)')
+    parser.add_argument('--output', default='Output', help='folder the outputs are written to (default: Output)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='number of processes used to scrape files in parallel (default: 1)')
+    parser.add_argument('--shard-pages', type=int, default=0,
+                        help='split each PDF into shards of this many pages so one large file can use '
+                             'several workers (default: 0, one shard per file)')
+    parser.add_argument('--engine', default='text', choices=['layout', 'text'],
+                        help='page parser; layout groups positioned lines into rows instead of reading the '
+                             'page text stream, so options cut off by a page break stay with their item '
+                             '(default: text)')
+    parser.add_argument('--extract', default='default', choices=['default', 'fast'],
+                        help='text extraction flags; fast skips ligature preservation and the CID lookup '
+                             'for unknown glyphs (default: default)')
+    parser.add_argument('--clip-top', type=float, default=0,
+                        help='only extract text this many points below the top of each page, leaving out '
+                             'the page-number header (default: 0, whole page)')
+    parser.add_argument('--cache', help='page text cache file (default: <output>/page_cache.sqlite)')
+    parser.add_argument('--cache-size', type=int, default=512,
+                        help='maximum page cache size in MB before old pages are evicted (default: 512)')
+    parser.add_argument('--no-cache', action='store_true', help='always extract page text from the PDFs')
+    parser.add_argument('--format', nargs='+', default=['xlsx'], choices=['xlsx', 'parquet', 'feather', 'csv'],
+                        help='output formats; parquet/feather/csv write one file per table into '
+                             '<output>/Order details/ (default: xlsx)')
+    parser.add_argument('--stream-xlsx', action='store_true',
+                        help='write the workbook in constant-memory mode, streaming Orders rows as they are '
+                             'scraped when xlsx is the only format and --incremental is off')
+    parser.add_argument('--keep-duplicates', action='store_true',
+                        help='keep orders that appear in more than one PDF instead of counting them once, '
+                             'and scrape every file even when its orders are already covered')
+    parser.add_argument('--orders', nargs='+', metavar='ORDER',
+                        help='only scrape these order numbers, reading just their pages (see --scan)')
+    parser.add_argument('--since', type=since_date, metavar='DATE',
+                        help='only scrape orders placed on or after this date, e.g. 2024-08-01 (see --scan)')
+    parser.add_argument('--scan', action='store_true',
+                        help='only list where each PDF\'s orders are; the page ranges are kept in the scan '
+                             'index, so later --orders and --since runs read just the pages they need')
+    parser.add_argument('--scan-index', help='order page ranges found by --scan, --orders and --since '
+                                             '(default: <output>/scan_index.sqlite)')
+    parser.add_argument('--incremental', action='store_true',
+                        help='only scrape PDFs and orders not seen by earlier incremental runs and merge them '
+                             'into the saved dataset')
+    parser.add_argument('--index', help='processed file/order index used by --incremental '
+                                        '(default: <output>/order_index.sqlite)')
+    parser.add_argument('--dataset', help='saved order rows used by --incremental '
+                                          '(default: <output>/orders_dataset.pkl)')
+    parser.add_argument('--watch', action='store_true',
+                        help='keep running and scrape PDFs as they land in the input folder, appending them '
+                             'to the --incremental dataset')
+    parser.add_argument('--poll', type=float, default=1.0,
+                        help='seconds between input folder scans with --watch when watchdog is not installed '
+                             '(default: 1)')
+    parser.add_argument('--debounce', type=float, default=2.0,
+                        help='seconds the input folder must be unchanged before --watch scrapes new PDFs '
+                             '(default: 2)')
+    parser.add_argument('--strict', action='store_true',
+                        help='reject orders with a missing address, phone or other field instead of filling '
+                             'in Unknown, for stores that are lenient by default')
+    parser.add_argument('--rejects', help='JSON lines file the orders that could not be parsed, and those kept '
+                                          'with fallback values, are written to with their raw text '
+                                          '(default: <output>/rejects.jsonl)')
+    parser.add_argument('--report', help='JSON run report with stage timings and counters '
+                                         '(default: <output>/run_report.json)')
+    parser.add_argument('--profile', nargs='?', const='cprofile', choices=['cprofile', 'pyinstrument'],
+                        help='profile the run with cProfile (default) or pyinstrument')
+    parser.add_argument('--profile-output', help='profile dump written by --profile '
+                                                 '(default: <output>/run_profile.prof or .html)')
+    args = parser.parse_args(argv)
+
+    if args.watch:
+        run_watch(args)
+    elif args.profile:
+        run_profiled(args)
+    else:
+        run(args)
@@ -0,0 +1,156 @@
+from collections import namedtuple
+import io
+import mmap
+import os
+
+import fitz
+
+from .cache import PageCache
+from .patterns import end_sent, patterns
+from .stats import stats
+
+
+# --extract fast keeps only mediabox clipping and whitespace preservation (the sample's SKU lines
+# carry a no-break space), dropping ligature preservation and the CID lookup for unknown glyphs
+fast_text_flags = fitz.TEXT_MEDIABOX_CLIP | fitz.TEXT_PRESERVE_WHITESPACE
+
+# clip_top > 0 extracts only the page body below that many points, leaving out the
+# page-number header instead of cutting it off the text afterwards
+ExtractOptions = namedtuple('ExtractOptions', ['fast', 'clip_top'])
+default_extract = ExtractOptions(False, 0)
+
+
+def extract_key(extract_options):
+    if extract_options == default_extract:
+        return ''
+    return f'/fast={int(extract_options.fast)},clip_top={extract_options.clip_top:g}'
+
+
+def is_pdf_source(value):
+    return isinstance(value, (str, os.PathLike, bytes, bytearray, memoryview, mmap.mmap)) or hasattr(value, 'read')
+
+
+def pdf_stream(source):
+    # Returns the PDF as a buffer fitz opens in place (it copies bytearrays and BytesIO itself),
+    # or None for a file path. A real binary file is memory-mapped rather than read.
+    if isinstance(source, (str, os.PathLike)):
+        return None
+    if isinstance(source, (bytes, memoryview)):
+        return source
+    if isinstance(source, (bytearray, mmap.mmap)):
+        return memoryview(source)
+    if isinstance(source, io.BytesIO):
+        return source.getbuffer()
+    try:
+        return memoryview(mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ))
+    except (AttributeError, OSError, ValueError, io.UnsupportedOperation):
+        return source.read()
+
+
+def open_pdf(source):
+    # A PDF is read from a file path, or from memory: bytes, a buffer or a binary file object
+    stream = pdf_stream(source)
+    if stream is None:
+        return fitz.open(source)
+    return fitz.open(stream=stream, filetype='pdf')
+
+
+def page_clip(page, extract_options):
+    if not extract_options.clip_top:
+        return None
+    return fitz.Rect(page.rect.x0, page.rect.y0 + extract_options.clip_top, page.rect.x1, page.rect.y1)
+
+
+def extract_page_text(page, extract_options=default_extract):
+    stats.count('pages')
+    with stats.stage('extract'):
+        if extract_options == default_extract:
+            return patterns['page_number'].split(page.get_text(), maxsplit=1)[-1]
+
+        clip = page_clip(page, extract_options)
+        flags = fast_text_flags if extract_options.fast else fitz.TEXTFLAGS_TEXT
+        page_text = page.get_textpage(clip=clip, flags=flags).extractText()
+        if clip:
+            return page_text
+        return patterns['page_number'].split(page_text, maxsplit=1)[-1]
+
+
+def iter_page_texts(file_path, start=0, stop=None, cache_path=None, extract_options=default_extract):
+    with open_pdf(file_path) as doc:
+        if not cache_path:
+            for page in doc.pages(start, stop):
+                yield extract_page_text(page, extract_options)
+            return
+
+        cache = PageCache(cache_path, extract_key(extract_options))
+        try:
+            pdf_hash = cache.file_hash(file_path)
+            for page_index in range(start, doc.page_count if stop is None else stop):
+                with stats.stage('cache'):
+                    page_text = cache.get(pdf_hash, page_index)
+                    if page_text is None:
+                        page_text = extract_page_text(doc[page_index], extract_options)
+                        cache.put(pdf_hash, page_index, page_text)
+                    else:
+                        stats.count('pages')
+                        stats.count('cached_pages')
+                yield page_text
+        finally:
+            cache.close()
+
+
+def page_closes_order(page_text):
+    return end_sent in page_text
+
+
+def text_order_number(order_info):
+    order_num_match = patterns['order_num'].search(order_info)
+    return order_num_match[1] if order_num_match else None
+
+
+def iter_orders(page_texts):
+    # The current order is kept as a list of page texts and only the newest two pages are
+    # searched for the end sentence / trailing price, so each page costs the same however
+    # long the order has grown. The carry-over rewrite is anchored at the end of the order,
+    # so it only ever needs the last two pages as well.
+    order_pages = []
+    end_check = False
+
+    for page_text in page_texts:
+        order_text = None
+        with stats.stage('stitch'):
+            cut_match = None
+            if end_check and page_text.startswith('Color:'):
+                cut_match = patterns['carry_color'].match(page_text) or False
+            elif end_check and page_text.startswith('Size:'):
+                cut_match = patterns['carry_size'].match(page_text) or False
+            elif end_check and page_text.startswith('SKU'):
+                cut_match = patterns['carry_sku'].match(page_text) or False
+            if cut_match is False:
+                # A continuation the patterns don't cover: the page is kept as it is, so at worst
+                # that one order fails to parse and is quarantined, instead of the run ending here
+                stats.count('unstitched_pages')
+            elif cut_match:
+                stats.count('continued_pages')
+                cut_text = cut_match[0]
+                # The cut options sit at the very start of the page, so slicing them off is enough
+                page_text = page_text[len(cut_text):]
+                # The cut options go back in front of the item's trailing quantity and price
+                order_pages[-2:] = [patterns['price_end'].sub(lambda price: cut_text + price[0], ''.join(order_pages[-2:]))]
+
+            if order_pages and not page_text.strip('\n'):
+                # Blank pages are folded into the previous one so the last two entries always hold text
+                order_pages[-1] += page_text
+            else:
+                order_pages.append(page_text)
+            recent_text = ''.join(order_pages[-2:])
+
+            end_check = False
+            if end_sent in recent_text:
+                order_text = ''.join(order_pages)
+                order_pages = []
+
+            elif patterns['price_end'].search(recent_text):
+                end_check = True
+        if order_text is not None:
+            yield order_text
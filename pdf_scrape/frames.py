@@ -0,0 +1,75 @@
+from operator import attrgetter
+
+import pandas as pd
+
+from .stats import stats
+
+
+def rows_to_frame(line_items, profile):
+    # Builds the Orders frame column by column instead of from one dict per row
+    line_items = list(line_items)
+    buyers = [line_item.buyer for line_item in line_items]
+    columns = {}
+    for column, attribute in profile.item_columns:
+        columns[column] = list(map(attrgetter(attribute), line_items))
+    for column, attribute in profile.buyer_columns:
+        columns[column] = list(map(attrgetter(attribute), buyers))
+    return pd.DataFrame(columns, columns=profile.order_columns)
+
+
+def map_distinct(values, transform):
+    # Runs a vectorized string transform once per distinct value and broadcasts the result back
+    # through the factor codes; item names and colours only have a handful of distinct values
+    codes, uniques = pd.factorize(values)
+    mapped = transform(pd.Series(uniques, dtype=object)).to_numpy(dtype=object)
+    return pd.Series(mapped[codes], index=values.index).where(codes >= 0)
+
+
+def short_item_names(items):
+    return items.str.strip().str.split().str[-1]
+
+
+def normalize_colors(colors, profile):
+    known_colors = colors.str.extract(profile.colors_pattern, expand=False)
+    stats.count('unknown_colors', int(known_colors.isna().sum()))
+    if not profile.color_fallback:
+        # Their line items were already checked for a known colour when they were parsed
+        return known_colors.replace({'Whtie': 'White', 'Back': 'Black'})
+    return known_colors.fillna(colors).replace({'Whtie': 'White', 'Back': 'Black'})
+
+
+def build_summaries(df, profile):
+    group_columns = ['Item', 'Size', 'Color', 'Design'] if profile.parse_design else ['Item', 'Size', 'Color']
+    summary_df1 = pd.DataFrame({
+        'Item': map_distinct(df['Item'], short_item_names),
+        'quantity': df['quantity'],
+        'Size': df['size'],
+        'Design': df['design'] if profile.parse_design else None,
+        'Color': map_distinct(df['color'], lambda colors: normalize_colors(colors, profile)),
+    }, columns=['Item', 'quantity', 'Size'] + group_columns[3:] + ['Color'])
+    summary_df2 = summary_df1.groupby(group_columns)['quantity'].sum().reset_index()
+
+    # Ensure the DataFrame is sorted as needed before writing to Excel
+    summary_df2['Size'] = pd.Categorical(summary_df2['Size'], categories=profile.size_order, ordered=True)
+    summary_df2 = summary_df2.sort_values(['Item', 'Color', 'Size'] + group_columns[3:])
+
+    # Buyer columns are the same on every row of an order, so the first row of each order stands in
+    # for groupby().agg('first'), which is slow on object columns; weights are summed per order
+    orders = df.dropna(subset=['order_number'])
+    shipping_summary = orders.drop_duplicates('order_number')[
+        ['order_number', 'email', 'Name', 'Street', 'City', 'Zipcode', 'State', 'Phone']]
+    total_weights = orders.groupby('order_number', sort=False)['Total Weight'].sum()
+    shipping_summary.insert(1, 'Total Weight', total_weights.to_numpy())
+    shipping_summary = shipping_summary.sort_values('order_number').reset_index(drop=True)
+
+    return summary_df1, summary_df2, shipping_summary
+
+
+def build_tables(df, profile):
+    summary_df1, summary_df2, shipping_summary = build_summaries(df, profile)
+    return {
+        'Orders': df,
+        'Production Summary Detailed': summary_df1,
+        'Production Summary Sorted': summary_df2,
+        'Shipping Summary': shipping_summary,
+    }
@@ -0,0 +1,104 @@
+from operator import attrgetter
+from os import path
+import os
+import sqlite3
+
+from .cache import create_file_hashes, stored_file_hash
+from .patterns import patterns
+from .stats import stats, warn
+
+
+class OrderIndex:
+    # Remembers the PDFs (by SHA-256, size and mtime) and order numbers that earlier --incremental
+    # runs already scraped, so a run only parses new files and orders. Files are known by content,
+    # so touched or renamed files are only new if their content changed; the hash of each path is
+    # kept in file_hashes and only recomputed when the file's size or mtime changes.
+    def __init__(self, index_path):
+        self.conn = sqlite3.connect(index_path, timeout=60)
+        self.conn.execute('CREATE TABLE IF NOT EXISTS files '
+                          '(sha256 TEXT PRIMARY KEY, path TEXT, size INTEGER, mtime REAL)')
+        self.conn.execute('CREATE TABLE IF NOT EXISTS orders (order_number TEXT PRIMARY KEY)')
+        create_file_hashes(self.conn, 'file_hashes')
+
+    def is_processed(self, file_path):
+        pdf_hash = stored_file_hash(self.conn, file_path, 'file_hashes')
+        return self.conn.execute('SELECT 1 FROM files WHERE sha256 = ?', (pdf_hash,)).fetchone() is not None
+
+    def known_orders(self):
+        return {order_number for order_number, in self.conn.execute('SELECT order_number FROM orders')}
+
+    def add(self, file_paths, order_numbers):
+        for file_path in file_paths:
+            stat = os.stat(file_path)
+            self.conn.execute('INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)',
+                              (stored_file_hash(self.conn, file_path, 'file_hashes'), path.abspath(file_path),
+                               stat.st_size, stat.st_mtime))
+        self.conn.executemany('INSERT OR IGNORE INTO orders VALUES (?)', [(str(n),) for n in order_numbers])
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+# What makes two copies of an order the same order: every line item's content, not the buyer
+item_fingerprint = attrgetter('item', 'quantity', 'total', 'options', 'size', 'color', 'design')
+
+
+def declared_orders(file_path):
+    # Exports are named after their orders, 'Orders - #PVD2D, #MQG4D, ....pdf'; long lists are cut
+    # with '...', and then the name only tells some of the file's orders
+    file_name = path.basename(file_path)
+    return set(patterns['file_orders'].findall(file_name)), '...' not in file_name
+
+
+class OrderDedup:
+    # Overlapping exports repeat orders, which the production and shipping summaries would count
+    # twice. Orders are fingerprinted as they stream out of the scraper, and a repeat with the same
+    # number and line items is dropped with one hash lookup. prefilter() goes further and skips
+    # whole files whose name lists only orders that are already covered, before any extraction.
+    def __init__(self, known_orders=()):
+        self.fingerprints = {}              # order number -> hash of its line items
+        self.covered = set(known_orders)    # orders a file may be skipped for
+
+    def prefilter(self, file_paths):
+        kept = []
+        for file_path in file_paths:
+            order_numbers, complete = declared_orders(file_path)
+            if complete and order_numbers and order_numbers <= self.covered:
+                stats.count('duplicate_files')
+                print(f'[Dedup]: skipping {path.basename(file_path)}, its {len(order_numbers)} order(s) '
+                      f'are already covered')
+                continue
+            self.covered |= order_numbers
+            kept.append(file_path)
+        return kept
+
+    def is_duplicate(self, line_items):
+        if not line_items:
+            return False
+        order_number = line_items[0].order_number
+        fingerprint = hash(tuple(map(item_fingerprint, line_items)))
+        seen = self.fingerprints.get(order_number)
+        if seen is None:
+            self.fingerprints[order_number] = fingerprint
+            return False
+        if seen != fingerprint:
+            # Kept, since the two copies disagree; the warning says which order to look at
+            warn('conflicting_orders', f'Warning: order {order_number} appears twice with different items.')
+            return False
+        stats.count('duplicate_orders')
+        stats.count('duplicate_rows', len(line_items))
+        return True
+
+    def unique_rejects(self, rejects):
+        # The rejected and kept orders of overlapping exports are repeated as well; the first copy of
+        # each is listed
+        seen, unique = set(), []
+        for reject in rejects:
+            key = (reject['order_number'] or reject['text'], reject['status'])
+            if key in seen:
+                stats.count('duplicate_rejects')
+                continue
+            seen.add(key)
+            unique.append(reject)
+        return unique
@@ -0,0 +1,162 @@
+import json
+
+import fitz
+
+from .cache import PageCache
+from .extract import default_extract, extract_key, fast_text_flags, open_pdf, page_clip
+from .parse import Buyer, build_line_item, get_buyer_data
+from .patterns import end_sent, patterns
+from .stats import stats, warn
+
+# The layout engine reads each page as positioned lines (x, y, text) from get_text('dict') instead
+# of one text stream. An item is the row holding its name, quantity and price, and every line below
+# it belongs to it until the next such row, so options cut off by a page break (Color:, Size:, SKU,
+# Design: ...) attach to their item without the text engine's carry-over rewrite.
+row_tolerance = 2.0       # points two lines' tops may differ by and still share a row
+column_tolerance = 2.0    # points a buyer line may sit off the 'Order #' column
+
+
+def extract_page_lines(page, extract_options=default_extract):
+    stats.count('pages')
+    with stats.stage('extract'):
+        clip = page_clip(page, extract_options)
+        flags = fast_text_flags if extract_options.fast else fitz.TEXTFLAGS_TEXT
+        lines = []
+        for block in page.get_text('dict', clip=clip, flags=flags)['blocks']:
+            for line in block['lines']:
+                text = ''.join(span['text'] for span in line['spans'])
+                if text.strip():
+                    lines.append((round(line['bbox'][0], 1), round(line['bbox'][1], 1), text))
+        if not clip:
+            # Like the text engine, drop everything up to the page-number header
+            for line_index, (_, _, text) in enumerate(lines):
+                if patterns['page_number_line'].search(text):
+                    lines = lines[line_index + 1:]
+                    break
+        lines.sort(key=lambda line: (line[1], line[0]))
+        return lines
+
+
+def iter_page_lines(file_path, start=0, stop=None, cache_path=None, extract_options=default_extract):
+    with open_pdf(file_path) as doc:
+        if not cache_path:
+            for page in doc.pages(start, stop):
+                yield extract_page_lines(page, extract_options)
+            return
+
+        cache = PageCache(cache_path, extract_key(extract_options) + '/layout')
+        try:
+            pdf_hash = cache.file_hash(file_path)
+            for page_index in range(start, doc.page_count if stop is None else stop):
+                with stats.stage('cache'):
+                    page_json = cache.get(pdf_hash, page_index)
+                    if page_json is None:
+                        lines = extract_page_lines(doc[page_index], extract_options)
+                        cache.put(pdf_hash, page_index, json.dumps(lines))
+                    else:
+                        lines = [tuple(line) for line in json.loads(page_json)]
+                        stats.count('pages')
+                        stats.count('cached_pages')
+                yield lines
+        finally:
+            cache.close()
+
+
+def layout_closes_order(lines):
+    return any(end_sent in text for _, _, text in lines)
+
+
+def iter_page_rows(lines):
+    # Lines come sorted by top then x; a new row starts once a line sits clearly below the row's first
+    row, row_top = [], None
+    for x, y, text in lines:
+        if row and y - row_top > row_tolerance:
+            yield sorted(row)
+            row = []
+        if not row:
+            row_top = y
+        row.append((x, text))
+    if row:
+        yield sorted(row)
+
+
+class LayoutOrder:
+    __slots__ = ('header', 'order_number', 'column', 'items', 'items_done')
+
+    def __init__(self):
+        self.header = []            # (x, text) lines above 'Order #'
+        self.order_number = None
+        self.column = None          # x of the 'Order #' line, the buyer column
+        self.items = []             # [name, option lines, quantity, price]
+        self.items_done = False     # set by the Items/Shipping/Total rows
+
+
+def layout_order_text(order):
+    # The order's lines joined back into text, for the rejects
+    lines = [text for _, text in order.header]
+    if order.order_number is not None:
+        lines.append(f'Order #{order.order_number}')
+    for item_name, options, quantity, price in order.items:
+        lines += [item_name] + options + [quantity, price]
+    return '\n'.join(lines)
+
+
+def iter_layout_orders(pages):
+    order = LayoutOrder()
+    for lines in pages:
+        finished = []
+        with stats.stage('stitch'):
+            if order.items and not order.items_done:
+                stats.count('continued_pages')
+            for row in iter_page_rows(lines):
+                texts = [text for _, text in row]
+                if any(end_sent in text for text in texts):
+                    # The rest of the page belongs to the finished order, as in the text engine
+                    finished.append(order)
+                    order = LayoutOrder()
+                    break
+                if order.order_number is None:
+                    order_num_match = patterns['order_num'].match(texts[0])
+                    if order_num_match:
+                        order.order_number, order.column = order_num_match[1], row[0][0]
+                    else:
+                        order.header += row
+                    continue
+                if order.items_done:
+                    continue
+                if patterns['price'].fullmatch(texts[-1]):
+                    if len(texts) > 2 and texts[-2].isdigit():
+                        order.items.append([texts[0], [], texts[-2], texts[-1]])
+                    else:
+                        order.items_done = True
+                elif order.items:
+                    order.items[-1][1] += texts
+        yield from finished
+
+
+def get_layout_order_data(order, profile):
+    if order.order_number is None:
+        if not profile.lenient:
+            raise ValueError("Order number not found in the order layout.")
+        warn('order_number_missing', "Order number not found in the order layout.")
+        return []
+
+    buyer_lines = [text for x, text in order.header if abs(x - order.column) <= column_tolerance]
+    date_index = next((line_index for line_index, text in enumerate(buyer_lines)
+                       if patterns['date_line'].fullmatch(text)), None)
+    order_details = None
+    if date_index is None:
+        if not profile.lenient:
+            raise ValueError(f"Date/time pattern not found in order {order.order_number}.")
+        warn('date_time_missing', "Date/time pattern not found in the order details.")
+    else:
+        order_details = '\n'.join(buyer_lines[date_index + 1:]) + '\n'
+    with stats.stage('buyer'):
+        buyer = Buyer(**get_buyer_data(order_details, profile))
+
+    order_list = []
+    for item_name, options, quantity, price in order.items:
+        item = '\n' + '\n'.join([item_name] + options + [quantity]) + '\n'
+        order_list.append(build_line_item(order.order_number, item_name, float(price.split('$')[1]), item,
+                                          buyer, profile))
+    return order_list
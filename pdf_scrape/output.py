@@ -0,0 +1,139 @@
+from itertools import chain, groupby, zip_longest
+from operator import itemgetter
+from os import path
+import json
+import os
+
+import pandas as pd
+
+# Columns written as categoricals in the columnar outputs; few distinct values, many rows
+category_columns = ['Item', 'Size', 'Color', 'Design', 'size', 'color', 'design']
+
+
+def write_columnar(tables, file_format, output_dir):
+    os.makedirs(output_dir, exist_ok=True)
+    for sheet_name, table in tables.items():
+        file_path = path.join(output_dir, f'{sheet_name}.{file_format}')
+        if file_format == 'csv':
+            table.to_csv(file_path, index=False)
+            continue
+        # feather needs a default index, and sorting left summary_df2 with a shuffled one
+        table = table.reset_index(drop=True)
+        for column in table.columns.intersection(category_columns):
+            if not isinstance(table[column].dtype, pd.CategoricalDtype):
+                table[column] = table[column].astype('category')
+        if file_format == 'parquet':
+            table.to_parquet(file_path, index=False)
+        else:
+            table.to_feather(file_path)
+
+
+# Orders that failed to parse (status 'rejected') or were kept with fallback values ('kept'), as
+# recorded by scrape.reject_order() and keep_order(); Excel cells hold at most 32767 characters,
+# so the Rejects sheet cuts the raw text where rejects.jsonl keeps all of it
+reject_columns = ['file', 'first_page', 'last_page', 'order_number', 'status', 'error', 'text']
+excel_cell_limit = 32767
+
+
+def rejects_table(rejects):
+    from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+    table = pd.DataFrame(rejects, columns=reject_columns)
+    # Page text can hold control characters no Excel cell takes, and openpyxl would refuse the whole
+    # workbook over one; they are only left out here, rejects.jsonl keeps them
+    for column in ['order_number', 'error', 'text']:
+        table[column] = table[column].str.replace(ILLEGAL_CHARACTERS_RE, '', regex=True)
+    table['text'] = table['text'].str.slice(0, excel_cell_limit)
+    return table
+
+
+def write_rejects(rejects, file_path, append=False):
+    os.makedirs(path.dirname(path.abspath(file_path)), exist_ok=True)
+    with open(file_path, 'a' if append else 'w', encoding='utf-8') as f:
+        for reject in rejects:
+            f.write(json.dumps(reject) + '\n')
+
+
+def workbook_layout(tables, profile):
+    # The store's sheets, plus a Rejects sheet when the run quarantined any orders
+    return profile.sheet_layout + ([('Rejects', 'Rejects', 0)] if 'Rejects' in tables else [])
+
+
+# Columns of the Orders rows that the summary sheets are built from
+summary_columns = ['order_number', 'Item', 'quantity', 'size', 'color', 'design', 'Total Weight',
+                   'email', 'Name', 'Street', 'City', 'Zipcode', 'State', 'Phone']
+
+
+def new_streaming_workbook():
+    # openpyxl's write-only mode spools every sheet to a temp file as rows are appended,
+    # instead of keeping a cell object per value until save()
+    from openpyxl import Workbook
+    return Workbook(write_only=True)
+
+
+def append_sheet_rows(sheet, rows):
+    for row in rows:
+        # Empty cells like to_excel, rather than NaN
+        sheet.append([None if isinstance(value, float) and value != value else value for value in row])
+
+
+def placed_rows(placements):
+    # Lays the tables of one sheet side by side, each from its own start column
+    tables = [chain([list(table.columns)], table.itertuples(index=False, name=None)) for table, _ in placements]
+    for parts in zip_longest(*tables):
+        row = []
+        for (_, startcol), part in zip(placements, parts):
+            if part is not None:
+                row.extend([None] * (startcol - len(row)))
+                row.extend(part)
+        yield row
+
+
+def append_sheets(workbook, tables, layout):
+    for sheet_name, placements in groupby(layout, key=itemgetter(0)):
+        placements = [(tables[table_name], startcol) for _, table_name, startcol in placements]
+        append_sheet_rows(workbook.create_sheet(sheet_name), placed_rows(placements))
+
+
+def stream_orders_sheet(workbook, rows, profile):
+    # Writes each scraped row to the Orders sheet as it arrives and keeps only the columns the
+    # summaries need, so the full 21-column frame is never built
+    sheet = workbook.create_sheet(profile.sheet_layout[0][0])
+    sheet.append(profile.order_columns)
+    columns = [column for column in summary_columns if column in profile.order_columns]
+    summary_values = itemgetter(*(profile.order_columns.index(column) for column in columns))
+    summary_rows = []
+    for row in rows:
+        values = profile.row_values(row)
+        sheet.append(values)
+        summary_rows.append(summary_values(values))
+    return pd.DataFrame(summary_rows, columns=columns)
+
+
+def write_workbook(tables, target, profile, stream_xlsx=False):
+    # target is a file path or a binary file object such as BytesIO
+    if stream_xlsx:
+        workbook = new_streaming_workbook()
+        append_sheets(workbook, tables, workbook_layout(tables, profile))
+        workbook.save(target)
+        return
+    with pd.ExcelWriter(target) as writer:
+        for sheet_name, table_name, startcol in workbook_layout(tables, profile):
+            tables[table_name].to_excel(writer, sheet_name=sheet_name, startcol=startcol, index=False)
+
+
+def write_outputs(tables, formats, output_dir, profile, stream_xlsx=False):
+    saved = []
+    for file_format in formats:
+        if file_format == 'xlsx':
+            output_file_path = path.join(output_dir, 'Order details.xlsx')
+            write_workbook(tables, output_file_path, profile, stream_xlsx)
+            saved.append(output_file_path)
+            continue
+        try:
+            write_columnar({table_name: tables[table_name] for _, table_name, _ in profile.sheet_layout},
+                           file_format, path.join(output_dir, 'Order details'))
+        except ImportError:
+            print(f'[ERROR]: {file_format} output skipped, it needs pyarrow installed')
+            continue
+        saved.append(path.join(output_dir, 'Order details', f'*.{file_format}'))
+    return saved
@@ -0,0 +1,215 @@
+from collections import namedtuple
+
+from .patterns import patterns
+from .stats import stats, warn
+
+
+def split_info(order_info: str, profile):
+    order_num_match = patterns['order_num'].search(order_info)
+    if not order_num_match:
+        if not profile.lenient:
+            raise ValueError("Order number pattern not found in the order info.")
+        warn('order_number_missing', "Order number pattern not found in the order info.")
+        return None, None, None
+
+    order_num = order_num_match[1]
+    order_details, item_info = patterns['order_split'].split(order_info, maxsplit=1)
+
+    split_details = patterns['date_time'].split(order_details)
+    if len(split_details) < 2:
+        if not profile.lenient:
+            raise ValueError(f"Date/time pattern not found in order {order_num}.")
+        warn('date_time_missing', "Date/time pattern not found in the order details.")
+        return order_num, item_info, None  # Return None for order_details if pattern not found
+
+    order_details = split_details[1]
+
+    return order_num, item_info, order_details
+
+
+unknown_buyer = {
+    'name': 'Unknown', 'street': 'Unknown', 'city': 'Unknown',
+    'state': 'Unknown', 'zipcode': 'Unknown', 'email': 'Unknown', 'phone': 'Unknown'
+}
+
+# Parsed buyer blocks by their lines (name through email and phone), least recently used first;
+# the shipping, payment and comment lines after them are left out of the key, so a repeat
+# customer's orders share one entry and only distinct buyers are parsed
+buyer_cache = {}
+buyer_cache_size = 4096
+
+
+def parse_buyer_block(order_details: str):
+    # The buyer's lines after the order date: name and street are its first two lines, taken apart with
+    # plain string splits, then the address, email and phone are searched for. Returns the fields,
+    # whether the email had to be rejoined, and the fields that weren't found, so get_buyer_data
+    # can warn or raise for every order the block is seen in.
+    buyer_block = order_details.split('\nBuyer\n', 1)[-1].strip()
+    name, found_name, order_details = buyer_block.partition('\n')
+    order_details = order_details.strip()
+    street, found_street, _ = order_details.partition('\n')
+    if not (found_name and found_street):
+        return None, False, ('buyer',)
+
+    buyer_info = {'name': name, 'street': street}
+    missing = []
+    address = patterns['address'].search(order_details)
+    if address:
+        buyer_info['city'] = address[1].strip()
+        buyer_info['state'] = address[2].strip()
+        buyer_info['zipcode'] = str(address[3])#.zfill(7)
+    else:
+        missing.append('address')
+        buyer_info['city'] = buyer_info['state'] = buyer_info['zipcode'] = 'Unknown'
+
+    email_rejoined = False
+    email_match = patterns['email'].search(order_details)
+    if not email_match:
+        email_rejoined = True
+        order_details = patterns['email_domain_break'].sub(r'\1', order_details)
+        order_details = patterns['email_com_break'].sub(r'\1', order_details)
+        email_match = patterns['email'].search(order_details)
+    buyer_info['email'] = email_match[1]
+    phone_match = patterns['phone'].search(order_details)
+    if phone_match:
+        buyer_info['phone'] = phone_match[0]
+    else:
+        missing.append('phone')
+        buyer_info['phone'] = "Phone not found"
+
+    return buyer_info, email_rejoined, tuple(missing)
+
+
+def get_buyer_data(order_details: str, profile):
+    if not order_details:
+        warn('buyer_details_missing', "Invalid or missing order details provided.")
+        return dict(unknown_buyer)
+
+    buyer_end = patterns['buyer_end'].search(order_details)
+    buyer_lines = order_details[:buyer_end.start() + 1] if buyer_end else order_details
+    entry = buyer_cache.pop(buyer_lines, None)
+    if entry is None:
+        stats.count('buyer_cache_misses')
+        entry = parse_buyer_block(buyer_lines)
+        if len(buyer_cache) >= buyer_cache_size:
+            del buyer_cache[next(iter(buyer_cache))]
+    else:
+        stats.count('buyer_cache_hits')
+    buyer_cache[buyer_lines] = entry
+
+    buyer_info, email_rejoined, missing = entry
+    if 'buyer' in missing:
+        if not profile.lenient:
+            raise ValueError("Buyer name and street not found in the order details.")
+        warn('buyer_parse_failed', "Error parsing buyer details: buyer name and street not found.")
+        return dict(unknown_buyer)
+    if 'address' in missing:
+        if not profile.lenient:
+            raise ValueError(f"Address pattern not found for buyer {buyer_info['name']}.")
+        warn('address_missing', "Address pattern not found in the order details.")
+    if email_rejoined:
+        stats.count('email_rejoined')
+    if 'phone' in missing:
+        if not profile.lenient:
+            raise ValueError(f"Phone pattern not found for buyer {buyer_info['name']}.")
+        warn('phone_missing', "Phone pattern not found in the order details.")
+
+    return dict(buyer_info)
+
+def calculate_mo_fee(cost, quantity, profile):
+    if not profile.round_mo_fee:
+        return 0.1 * cost * quantity
+    try:
+        cost = float(cost)
+        quantity = int(quantity)
+        return round(0.1 * cost * quantity, 2)
+    except (ValueError, TypeError):
+        warn('mo_fee_failed', f"Warning: Could not calculate Mo_Fee. Cost: {cost}, Quantity: {quantity}")
+        return 0
+
+ItemOptions = namedtuple('ItemOptions', ['options', 'size', 'color', 'design', 'sku'])
+
+
+def parse_options(item, profile):
+    options_match = profile.options_pattern.search(item)
+    if not options_match:
+        return None
+    options, size, color, sku = options_match.group('options', 'size', 'color', 'sku')
+    design = options_match['design'] if profile.parse_design else None
+    return ItemOptions(options, size, color, design or 'N/A', sku)
+
+
+class Buyer:
+    # Parsed once per order and shared by all of its line items
+    __slots__ = ('name', 'street', 'city', 'state', 'zipcode', 'email', 'phone')
+
+    def __init__(self, name, street, city, state, zipcode, email, phone):
+        self.name = name
+        self.street = street
+        self.city = city
+        self.state = state
+        self.zipcode = zipcode
+        self.email = email
+        self.phone = phone
+
+
+class LineItem:
+    __slots__ = ('order_number', 'item', 'total', 'quantity', 'cost', 'options', 'size', 'color', 'design',
+                 'weight', 'total_weight', 'donation_sub', 'donation_total', 'mo_fee', 'buyer')
+
+    def __init__(self, order_number, item, total, quantity, cost, options, size, color, design,
+                 weight, total_weight, donation_sub, donation_total, mo_fee, buyer):
+        self.order_number = order_number
+        self.item = item
+        self.total = total
+        self.quantity = quantity
+        self.cost = cost
+        self.options = options
+        self.size = size
+        self.color = color
+        self.design = design
+        self.weight = weight
+        self.total_weight = total_weight
+        self.donation_sub = donation_sub
+        self.donation_total = donation_total
+        self.mo_fee = mo_fee
+        self.buyer = buyer
+
+
+def build_line_item(order_num, item_name, total, item, buyer, profile):
+    # item is the item's own text: name, options block and quantity, one per line
+    quantity = int(patterns['quantity'].search(item)[1])
+    item_options = parse_options(item, profile)
+    if not item_options:
+        if not profile.lenient:
+            raise ValueError(f"Could not find options for {item_name} in order {order_num}.")
+        warn('options_missing', f"Warning: Could not find options for item: {item}")
+        item_options = ItemOptions('Options not found', 'N/A', 'N/A', 'N/A', None)
+    if not profile.color_fallback and not profile.colors_pattern.search(item_options.color):
+        # Checked per item rather than in the summaries, so only this order is set aside
+        raise ValueError(f"No known colour in {item_options.color!r} for {item_name} in order {order_num}.")
+    item_size = item_options.size.upper()
+    product = profile.catalog.lookup(item_name, item_size, profile.fuzzy_item_types)
+    cost, weight, donation_sub = product.cost, product.weight, product.donation
+
+    return LineItem(
+        order_num, item_name, total, quantity, cost,
+        item_options.options, item_options.size, item_options.color, item_options.design,
+        weight, weight * quantity, donation_sub, donation_sub * quantity,
+        calculate_mo_fee(cost, quantity, profile), buyer,
+    )
+
+
+def get_order_data(order_info, profile):
+    order_num, item_info, order_details = split_info(order_info, profile)
+    with stats.stage('buyer'):
+        buyer = Buyer(**get_buyer_data(order_details, profile))
+    item_info = item_info.split('Items')[0].strip()
+    items = patterns['price_split'].split(item_info)
+    order_list = []
+
+    for item, price in zip(items[0:-1:2], items[1:-1:2]):
+        item_name = patterns['item_name'].match(item)[1]
+        order_list.append(build_line_item(order_num, item_name, float(price.split('$')[1]), item, buyer, profile))
+
+    return order_list
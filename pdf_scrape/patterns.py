@@ -0,0 +1,50 @@
+import re
+
+end_sent = 'Thank you for your order!'    # last sentence of an order
+
+# Every pattern the scraper uses, compiled once at import instead of going through re's cache per call.
+# The item options pattern depends on the store profile, see options_pattern().
+patterns = {
+    # page loop
+    'page_number': re.compile(r'\s\d{1,3}\/\d{1,3}\s'),   # pattern of page number eg 1/19
+    'price_end': re.compile(r'\d+\n\$\d+\.\d+\n*$'),   # quantity and price closing an item
+    # whole option lines, whatever they hold: 'SKU\xa0: 00SS' in the exports, '-' in V3 colours;
+    # the Design: line under the colour moves with it, or it would start the next item
+    'carry_color': re.compile(r'Color:[^\n]+\n(?:Design:[^\n]+\n)?'),
+    'carry_size': re.compile(r'Size:[^\n]+\nColor:[^\n]+\n(?:Design:[^\n]+\n)?'),
+    'carry_sku': re.compile(r'SKU\W*[^\n]*\nSize:[^\n]+\nColor:[^\n]+\n(?:Design:[^\n]+\n)?'),
+    # split_info
+    'order_num': re.compile(r'Order #(\w+)'),
+    'order_split': re.compile(r'Order #\w+'),
+    'date_time': re.compile(r'\n\w{3} \d{1,2}, \d{4}, \d{2}:\d{2} \w{2}\n'),
+    # get_buyer_data
+    'buyer_end': re.compile(r'\n(?:Shipped via|Payment method|Order comments)'),
+    'address': re.compile(r'([\w ]+),([a-zA-Z\s]+)\n*([\d\n-]{4,})\nUnited States'),
+    'email': re.compile(r'\b([A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,7})\b'),
+    'email_domain_break': re.compile(r'\n(\w+\.com\n)'),
+    'email_com_break': re.compile(r'\n([com]+(?:\n|$))'),
+    'phone': re.compile(r'\+\d \d{3}-\d{3}-\d{4}'),
+    # get_order_data
+    'price_split': re.compile(r'(\$\d+\.\d+)'),
+    'item_name': re.compile(r'\n*([^\n]+)\n'),
+    'quantity': re.compile(r'\n(\d+)\n'),
+    # layout engine, matched against single positioned lines
+    'page_number_line': re.compile(r'(?:^|\s)\d{1,3}\/\d{1,3}(?:\s|$)'),
+    'date_line': re.compile(r'\w{3} \d{1,2}, \d{4}, \d{2}:\d{2} \w{2}'),
+    'price': re.compile(r'\$\d+\.\d+'),
+    # index.declared_orders, matched against export file names
+    'file_orders': re.compile(r'#(\w+)'),
+}
+
+
+def options_pattern(option_chars, color_chars, parse_design):
+    # SKU, Size, Color and (optionally) Design in one pass; 'options' is the Size/Color/Design block
+    # as written. option_chars is what the block may contain, color_chars what the colour value keeps
+    # (the older scripts cut the colour at a '-' that the options block still allows).
+    design = rf'(?:\nDesign: ?(?P<design>{option_chars}+))?' if parse_design else ''
+    return re.compile(r'\n(?:SKU\W*(?P<sku>[^\n]*)\n)?'
+                      rf'(?P<options>Size: (?P<size>\w+)\nColor: ?(?P<color>{color_chars}+){option_chars}*{design})\n')
+
+
+def colors_pattern(colors):
+    return re.compile('(' + '|'.join(colors) + ')')
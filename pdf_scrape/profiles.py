@@ -0,0 +1,88 @@
+from operator import attrgetter
+
+from .catalog import load_catalog
+from .patterns import colors_pattern, options_pattern
+
+adult_size_order = ['XS','S', 'M', 'L', 'XL', '2XL', '3XL', '4XL','5XL']
+youth_size_order = ['YS','YM','YL','YXL','XS','S', 'M', 'L', 'XL', '2XL', '3XL', '4XL','5XL']
+
+basic_colors = ['Black', 'Green', 'Grey', 'Brown', 'White', 'Whtie', 'Back', 'Tan']
+extended_colors = basic_colors + ['Red', 'Blue', 'Orange', 'Yellow']
+
+# Orders sheet columns, in order, and the LineItem / Buyer attribute each one is read from
+item_columns = [
+    ('order_number', 'order_number'), ('Item', 'item'), ('total', 'total'), ('quantity', 'quantity'),
+    ('Cost', 'cost'), ('options', 'options'), ('size', 'size'), ('color', 'color'), ('design', 'design'),
+    ('Weight', 'weight'), ('Total Weight', 'total_weight'), ('Donation_Sub', 'donation_sub'),
+    ('Donation Total', 'donation_total'), ('Mo_Fee', 'mo_fee'),
+]
+buyer_columns = [
+    ('email', 'email'), ('Name', 'name'), ('Street', 'street'), ('City', 'city'),
+    ('Zipcode', 'zipcode'), ('State', 'state'), ('Phone', 'phone'),
+]
+
+# Workbook layouts: (sheet name, table, start column)
+four_sheet_layout = [
+    ('Orders', 'Orders', 0),
+    ('Production Summary Detailed', 'Production Summary Detailed', 0),
+    ('Production Summary Sorted', 'Production Summary Sorted', 0),
+    ('Shipping Summary', 'Shipping Summary', 0),
+]
+side_by_side_layout = [
+    ('orders', 'Orders', 0),
+    ('Production Summary', 'Production Summary Detailed', 0),
+    ('Production Summary', 'Production Summary Sorted', 5),
+]
+
+
+class Profile:
+    # Everything that differs between the stores' scraper scripts. catalog is a product catalog in
+    # catalogs/ (types, costs, weights and donations) by name, or the path of a .json/.csv one.
+    # lenient=False reproduces the older scripts, which stop at the first order they cannot parse
+    # instead of filling in defaults, and color_fallback=False rejects an order with a colour missing
+    # from the colour list.
+    def __init__(self, name, catalog, size_order, colors, parse_design=True, option_chars=r'[\w\(\)\~ -]',
+                 color_chars=None, lenient=True, fuzzy_item_types=True, mo_fee_column='Mo_Fee',
+                 round_mo_fee=True, color_fallback=True, sheet_layout=four_sheet_layout):
+        self.name = name
+        self.catalog = load_catalog(catalog)
+        self.size_order = size_order
+        self.colors = colors
+        self.parse_design = parse_design
+        self.lenient = lenient
+        self.fuzzy_item_types = fuzzy_item_types
+        self.round_mo_fee = round_mo_fee
+        self.color_fallback = color_fallback
+        self.sheet_layout = sheet_layout
+
+        self.options_pattern = options_pattern(option_chars, color_chars or option_chars, parse_design)
+        self.colors_pattern = colors_pattern(colors)
+        self.item_columns = [(mo_fee_column if attribute == 'mo_fee' else column, attribute)
+                             for column, attribute in item_columns if parse_design or attribute != 'design']
+        self.buyer_columns = buyer_columns
+        self.order_columns = [column for column, _ in self.item_columns + self.buyer_columns]
+        self.item_values = attrgetter(*(attribute for _, attribute in self.item_columns))
+        self.buyer_values = attrgetter(*(attribute for _, attribute in self.buyer_columns))
+
+    def row_values(self, line_item):
+        # One Orders sheet row, in order_columns order
+        return self.item_values(line_item) + self.buyer_values(line_item.buyer)
+
+
+# One profile per original script; the scripts now only pick their profile
+profiles = {
+    'prime': Profile('prime', 'adult', adult_size_order, basic_colors, parse_design=False,
+                     option_chars=r'[\w\(\)\~ ]', lenient=False, fuzzy_item_types=False, mo_fee_column='Moo_Fee',
+                     round_mo_fee=False, color_fallback=False, sheet_layout=side_by_side_layout),
+    'sc3': Profile('sc3', 'adult', adult_size_order, basic_colors, parse_design=False,
+                   option_chars=r'[\w\(\)\~ ]', lenient=False, fuzzy_item_types=False, mo_fee_column='Moo_Fee',
+                   round_mo_fee=False, color_fallback=False),
+    'yt': Profile('yt', 'youth', youth_size_order, extended_colors, parse_design=False,
+                  option_chars=r'[\w\(\)\~ ]', fuzzy_item_types=False, mo_fee_column='Moo_Fee', round_mo_fee=False,
+                  color_fallback=False),
+    'yt_v2': Profile('yt_v2', 'youth', youth_size_order, extended_colors, parse_design=False,
+                     color_chars=r'[\w\(\)\~ ]', fuzzy_item_types=False, mo_fee_column='Moo_Fee', round_mo_fee=False,
+                     color_fallback=False),
+    'v3_design': Profile('v3_design', 'youth', youth_size_order, extended_colors),
+}
+default_profile = 'v3_design'
@@ -0,0 +1,90 @@
+from collections import namedtuple
+from datetime import datetime
+import sqlite3
+
+from .cache import create_file_hashes, stored_file_hash
+from .extract import default_extract, iter_page_texts
+from .patterns import end_sent, patterns
+from .stats import stats
+
+# Where each order sits in a PDF: pages start to stop (0-based, stop exclusive, like a shard) and
+# the order date as 'YYYY-MM-DDTHH:MM', or None when the pages don't show one
+OrderSpan = namedtuple('OrderSpan', ['order_number', 'order_date', 'start', 'stop'])
+
+
+def order_date(date_text):
+    try:
+        return datetime.strptime(date_text, '%b %d, %Y, %I:%M %p').isoformat(timespec='minutes')
+    except ValueError:
+        return None
+
+
+def scan_pdf(file_path, cache_path=None, extract_options=default_extract):
+    # Finds the orders' page ranges without parsing them: an order runs from the page after the
+    # previous 'Thank you' page to its own, as in the page loop, and its number and date are the
+    # first ones on those pages. With a page cache the text read here is reused by the scrape.
+    spans = []
+    start, order_number, date = 0, None, None
+    for page_index, page_text in enumerate(iter_page_texts(file_path, 0, None, cache_path, extract_options)):
+        stats.count('scanned_pages')
+        if order_number is None:
+            order_num_match = patterns['order_num'].search(page_text)
+            order_number = order_num_match[1] if order_num_match else None
+        if date is None:
+            date_match = patterns['date_line'].search(page_text)
+            date = order_date(date_match[0]) if date_match else None
+        if end_sent in page_text:
+            spans.append(OrderSpan(order_number, date, start, page_index + 1))
+            start, order_number, date = page_index + 1, None, None
+    # Like the page loop, an order without its closing page is left out
+    return spans
+
+
+class ScanIndex:
+    # The order spans of every PDF scanned so far, by SHA-256, so later runs with --orders or
+    # --since go straight to the pages they need
+    def __init__(self, index_path):
+        self.conn = sqlite3.connect(index_path, timeout=60)
+        create_file_hashes(self.conn)
+        self.conn.execute('CREATE TABLE IF NOT EXISTS scanned (sha256 TEXT PRIMARY KEY)')
+        self.conn.execute('CREATE TABLE IF NOT EXISTS spans '
+                          '(sha256 TEXT, start INTEGER, stop INTEGER, order_number TEXT, order_date TEXT, '
+                          'PRIMARY KEY (sha256, start))')
+
+    def spans(self, file_path, cache_path=None, extract_options=default_extract):
+        pdf_hash = stored_file_hash(self.conn, file_path)
+        if self.conn.execute('SELECT 1 FROM scanned WHERE sha256 = ?', (pdf_hash,)).fetchone():
+            stats.count('scan_index_hits')
+            return [OrderSpan(*row) for row in self.conn.execute(
+                'SELECT order_number, order_date, start, stop FROM spans WHERE sha256 = ? ORDER BY start',
+                (pdf_hash,))]
+        with stats.stage('scan'):
+            spans = scan_pdf(file_path, cache_path, extract_options)
+        self.conn.executemany('INSERT OR REPLACE INTO spans VALUES (?, ?, ?, ?, ?)',
+                              [(pdf_hash, span.start, span.stop, span.order_number, span.order_date)
+                               for span in spans])
+        self.conn.execute('INSERT OR REPLACE INTO scanned VALUES (?)', (pdf_hash,))
+        self.conn.commit()
+        return spans
+
+    def close(self):
+        self.conn.close()
+
+
+def select_spans(spans, order_numbers=None, since=None):
+    # since is an ISO date or date-time; an order whose date wasn't found is kept rather than
+    # silently dropped
+    return [span for span in spans
+            if (not order_numbers or span.order_number in order_numbers)
+            and (not since or span.order_date is None or span.order_date >= since)]
+
+
+def span_page_ranges(spans):
+    # Joins the spans of neighbouring orders, so they are read as one run of pages
+    ranges = []
+    for span in spans:
+        if ranges and ranges[-1][1] == span.start:
+            ranges[-1] = (ranges[-1][0], span.stop)
+        else:
+            ranges.append((span.start, span.stop))
+    return ranges
@@ -0,0 +1,265 @@
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import groupby
+from operator import attrgetter
+from os import path
+import os
+import time
+
+from .cache import PageCache
+from .extract import (default_extract, is_pdf_source, iter_orders, iter_page_texts, open_pdf, page_closes_order,
+                      text_order_number)
+from .layout import (get_layout_order_data, iter_layout_orders, iter_page_lines, layout_closes_order,
+                     layout_order_text)
+from .parse import get_order_data
+from .profiles import default_profile, profiles
+from .stats import stats, warn
+
+# A parsing engine: how pages are read, which page closes an order, how pages become orders and
+# orders become line items, and an order's raw text for the rejects. Engines are passed around by
+# name so shard workers can look them up.
+Engine = namedtuple('Engine', ['iter_pages', 'closes_order', 'iter_orders', 'order_number', 'parse_order',
+                               'order_text'])
+engines = {
+    'text': Engine(iter_page_texts, page_closes_order, iter_orders, text_order_number, get_order_data, str),
+    'layout': Engine(iter_page_lines, layout_closes_order, iter_layout_orders, attrgetter('order_number'),
+                     get_layout_order_data, layout_order_text),
+}
+
+
+class PageTracker:
+    # Numbers the pages pulled through it, so an order that fails to parse can be reported with its
+    # file and pages. Both engines hand over an order as soon as its closing page is read, so an
+    # order runs from the page after the previous one up to the last page read. rejects is the list
+    # its rejected orders go to, stats.rejects when None.
+    def __init__(self, pages, source=None, first_page=0, rejects=None):
+        self.pages = pages
+        self.source = source
+        self.rejects = rejects
+        self.order_start = self.next_page = first_page
+
+    def __iter__(self):
+        for page in self.pages:
+            self.next_page += 1
+            yield page
+
+    def order_pages(self):
+        first_page, self.order_start = self.order_start + 1, self.next_page
+        return first_page, self.next_page
+
+
+def order_record(order, status, reason, engine, order_pages=None, source=None):
+    # One entry of the Rejects sheet and rejects.jsonl, with the order's raw text
+    first_page, last_page = order_pages or (None, None)
+    return {
+        'file': 'memory' if source is None else path.basename(str(source)),
+        'first_page': first_page,
+        'last_page': last_page,
+        'order_number': engines[engine].order_number(order),
+        'status': status,
+        'error': reason,
+        'text': engines[engine].order_text(order),
+    }
+
+
+def reject_order(order, error, engine, order_pages=None, source=None, rejects=None):
+    # Quarantines an order instead of letting one bad page end the run: the order is left out of the
+    # outputs and kept, with its raw text, for the Rejects sheet and rejects.jsonl
+    record = order_record(order, 'rejected', f'{type(error).__name__}: {error}', engine, order_pages, source)
+    (stats.rejects if rejects is None else rejects).append(record)
+    warn('rejected_orders', f"[Rejected]: order #{record['order_number']} in {record['file']} pages "
+                            f"{record['first_page']}-{record['last_page']}: {record['error']}")
+
+
+def keep_order(order, warnings, engine, order_pages=None, source=None, rejects=None):
+    # A lenient store fills in what it couldn't parse ('Unknown' buyers, 'N/A' options, 'Other' items,
+    # a zero Mo_Fee) and keeps the order in the outputs; it is listed with the rejects as well, marked
+    # kept, so those values can be found and checked
+    stats.count('kept_orders')
+    (stats.rejects if rejects is None else rejects).append(
+        order_record(order, 'kept', ' / '.join(warnings), engine, order_pages, source))
+
+
+def iter_order_items(orders, profile, known_orders=None, engine='text', tracker=None):
+    # Yields each parsed order's line items
+    order_number, parse_order = engines[engine].order_number, engines[engine].parse_order
+    for order in orders:
+        order_pages = tracker.order_pages() if tracker else None
+        if known_orders and order_number(order) in known_orders:
+            # Skip orders an earlier incremental run already parsed before doing any real work
+            stats.count('skipped_orders')
+            continue
+        source, rejects = (tracker.source, tracker.rejects) if tracker else (None, None)
+        stats.order_warnings.clear()
+        try:
+            with stats.stage('parse'):
+                line_items = parse_order(order, profile)
+        except Exception as e:
+            reject_order(order, e, engine, order_pages, source, rejects)
+            continue
+        if stats.order_warnings:
+            keep_order(order, stats.order_warnings, engine, order_pages, source, rejects)
+        stats.count('orders')
+        stats.count('items', len(line_items))
+        yield line_items
+
+
+def iter_rows(orders, profile, known_orders=None, engine='text', tracker=None, dedup=None):
+    for line_items in iter_order_items(orders, profile, known_orders, engine, tracker):
+        if dedup is None or not dedup.is_duplicate(line_items):
+            yield from line_items
+
+
+def scrape_pages(pages, profile, known_orders=None, engine='text', tracker=None):
+    # The line items of every order, kept apart so the parent process can drop repeated orders
+    return list(iter_order_items(engines[engine].iter_orders(pages), profile, known_orders, engine, tracker))
+
+
+def iter_source_rows(sources, profile, known_orders, engine, extract_options, rejects):
+    for source in sources:
+        # Rejects are labelled with the file a path names, or 'memory' for an in-memory PDF
+        pages = PageTracker(engines[engine].iter_pages(source, 0, None, None, extract_options),
+                            source if isinstance(source, (str, os.PathLike)) else None, rejects=rejects)
+        yield from iter_rows(engines[engine].iter_orders(pages), profile, known_orders, engine, pages)
+
+
+def scrape_orders(sources, profile=default_profile, engine='text', extract_options=default_extract,
+                  known_orders=None, as_frame=False, rejects=None):
+    # Library entry point for PDFs that are already in memory. sources is one source or an iterable
+    # of them: file paths, PDF bytes, bytearrays, memoryviews, mmaps or binary file objects, opened
+    # in place without a temp file or an extra copy. Returns the rows as an iterator that parses
+    # each order as it is pulled, or the Orders frame with as_frame=True.
+    # The orders that fail to parse are appended to the rejects list, when one is given, as the rows
+    # are pulled; they are never kept in the process-wide stats, so a long-running caller scraping
+    # one PDF after another holds on to no one else's rejects.
+    if isinstance(profile, str):
+        profile = profiles[profile]
+    if is_pdf_source(sources):
+        sources = [sources]
+    rows = iter_source_rows(sources, profile, known_orders, engine, extract_options,
+                            [] if rejects is None else rejects)
+    if not as_frame:
+        return rows
+    from .frames import rows_to_frame
+    return rows_to_frame(rows, profile)
+
+
+def plan_shards(file_path, shard_pages=0, page_ranges=None):
+    # page_ranges limits the file to those (start, stop) pages, e.g. the orders picked by --orders
+    if page_ranges is None:
+        if not shard_pages:
+            return [(file_path, 0, None)]
+        with open_pdf(file_path) as doc:
+            page_ranges = [(0, doc.page_count)]
+    if not shard_pages:
+        return [(file_path, start, stop) for start, stop in page_ranges]
+    return [(file_path, shard_start, min(shard_start + shard_pages, stop))
+            for start, stop in page_ranges for shard_start in range(start, stop, shard_pages)]
+
+
+def scrape_shard(file_path, start, stop, profile, cache_path=None, known_orders=None, worker=False,
+                 extract_options=default_extract, engine='text'):
+    # Runs in a worker process when --workers > 1, so only return plain data; a worker also sends
+    # back the stage timers and counters it collected for this shard.
+    # A shard may start or end in the middle of an order, so only the orders between its
+    # first and last 'Thank you' page are parsed here. The pages before (head) and after
+    # (tail) are handed back raw for merge_shards to stitch with the neighbouring shards.
+    if worker:
+        stats.reset()
+    start_time = time.perf_counter()
+    closes_order = engines[engine].closes_order
+    pages = PageTracker(engines[engine].iter_pages(file_path, start, stop, cache_path, extract_options),
+                        file_path, start)
+    head, tail = [], []
+    closed = False
+    for page in pages:
+        head.append(page)
+        if closes_order(page):
+            closed = True
+            break
+    pages.order_start = pages.next_page
+
+    def body_pages():
+        for page in pages:
+            tail.append(page)
+            yield page
+            if closes_order(page):
+                tail.clear()
+
+    order_list = scrape_pages(body_pages(), profile, known_orders, engine, pages)
+    tail_start = pages.next_page - len(tail)
+    shard_stats = stats.snapshot() if worker else None
+    return start, head, order_list, tail, tail_start, closed, time.perf_counter() - start_time, shard_stats
+
+
+def merge_shards(shards, profile, known_orders=None, engine='text', source=None, dedup=None):
+    carry, carry_start = [], 0
+    for start, head, shard_orders, tail, tail_start, closed, _, shard_stats in shards:
+        if not carry:
+            # Shards of --orders page ranges needn't follow on from the one before
+            carry_start = start
+        carry += head
+        if closed:
+            # Repair pass: re-stitch the order straddling the shard edge
+            carry_pages = PageTracker(carry, source, carry_start)
+            yield from iter_rows(engines[engine].iter_orders(carry_pages), profile, known_orders, engine, carry_pages,
+                                 dedup)
+        # Merged after the repair pass so the rejects stay in page order
+        if shard_stats:
+            stats.merge(shard_stats)
+        if closed:
+            for line_items in shard_orders:
+                if dedup is None or not dedup.is_duplicate(line_items):
+                    yield from line_items
+            carry, carry_start = tail, tail_start
+    # Like the page loop, an order without its closing page is dropped
+
+
+def scrape_files(file_paths, profile, workers=1, shard_pages=0, cache_path=None, known_orders=None,
+                 extract_options=default_extract, engine='text', dedup=None, page_ranges=None):
+    # dedup is an index.OrderDedup that drops orders repeated across the files, or None to keep them;
+    # page_ranges maps a file to the (start, stop) pages to scrape, see scan.ScanIndex
+    if workers <= 1 and not shard_pages and page_ranges is None:
+        # Plain serial run: stream rows straight from the pages without buffering a file
+        for file_path in file_paths:
+            print(f'[Scraping...]: {path.basename(file_path)}', end='\t')
+            start_time = time.perf_counter()
+            row_count = 0
+            pages = PageTracker(engines[engine].iter_pages(file_path, 0, None, cache_path, extract_options), file_path)
+            for row in iter_rows(engines[engine].iter_orders(pages), profile, known_orders, engine, pages, dedup):
+                row_count += 1
+                yield row
+            print(f'[Completed] {row_count} rows in {time.perf_counter() - start_time:.2f}s')
+        return
+
+    tasks = [shard for file_path in file_paths
+             for shard in plan_shards(file_path, shard_pages,
+                                       None if page_ranges is None else page_ranges[file_path])]
+    if not tasks:
+        return
+    print(f'[Scraping...]: {len(file_paths)} file(s) in {len(tasks)} shard(s)')
+    if cache_path:
+        # Hash every file up front so the shard workers don't all hash the same PDF
+        cache = PageCache(cache_path)
+        for file_path in file_paths:
+            cache.file_hash(file_path)
+        cache.close()
+
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 and len(tasks) > 1 else None
+    try:
+        # Both map()s yield in submission order, so the merged rows keep the file and page order
+        shard_scraper = partial(scrape_shard, profile=profile, cache_path=cache_path, known_orders=known_orders,
+                                worker=executor is not None, extract_options=extract_options, engine=engine)
+        results = executor.map(shard_scraper, *zip(*tasks)) if executor else map(shard_scraper, *zip(*tasks))
+        for file_path, group in groupby(zip(tasks, results), key=lambda pair: pair[0][0]):
+            shards = [shard for _, shard in group]
+            row_count = 0
+            for row in merge_shards(shards, profile, known_orders, engine, file_path, dedup):
+                row_count += 1
+                yield row
+            elapsed = sum(shard[6] for shard in shards)
+            print(f'[Completed]: {path.basename(file_path)}\t{row_count} rows from {len(shards)} shard(s) in {elapsed:.2f}s')
+    finally:
+        if executor:
+            executor.shutdown()
@@ -0,0 +1,288 @@
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import parse_qs
+import argparse
+import asyncio
+import io
+import json
+import time
+
+from .profiles import default_profile, profiles
+from .stats import RunStats, stats
+
+# A small HTTP service for scraping uploaded exports, written as a plain ASGI application so it
+# runs under any ASGI server (uvicorn, hypercorn, ...) without a web framework:
+#
+#   POST /scrape?store=v3_design&engine=text&format=xlsx   body: the PDF bytes
+#   GET  /metrics                                          request timings and counters as JSON
+#   GET  /                                                 upload page for a browser
+#
+#   python -m pdf_scrape.service --port 8000 --workers 2
+#   curl --data-binary @export.pdf -o "Order details.xlsx" http://127.0.0.1:8000/scrape
+#
+# Uploads are scraped from memory in a pool of worker processes that are started, with pandas and
+# PyMuPDF imported, before the first request comes in.
+
+xlsx_type = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+chunk_size = 64 * 1024
+
+upload_page = b'''<!doctype html>
+<title>Order scraper</title>
+<form id="upload">
+  <input type="file" id="pdf" accept="application/pdf" required>
+  <select id="store">%(stores)s</select>
+  <button>Scrape</button> <span id="status"></span>
+</form>
+<script>
+document.getElementById('upload').onsubmit = async event => {
+  event.preventDefault();
+  const status = document.getElementById('status');
+  status.textContent = 'Scraping...';
+  const store = document.getElementById('store').value;
+  const response = await fetch('/scrape?store=' + store, {method: 'POST', body: document.getElementById('pdf').files[0]});
+  if (!response.ok) { status.textContent = await response.text(); return; }
+  const link = document.createElement('a');
+  link.href = URL.createObjectURL(await response.blob());
+  link.download = 'Order details.xlsx';
+  link.click();
+  status.textContent = 'Completed';
+};
+</script>
+'''
+
+
+def warm_worker():
+    # Runs once in every pool process, so no request pays for the heavy imports
+    from . import frames, output, scrape
+
+
+def scrape_upload(pdf_bytes, store, engine, response_format):
+    # Runs in a pool process: scrapes one uploaded PDF and returns the response body, the row
+    # count and the stage timers for the request
+    from .frames import build_tables
+    from .output import rejects_table, workbook_layout, write_workbook
+    from .scrape import scrape_orders
+
+    profile = profiles[store]
+    stats.reset()
+    rejects = []
+    with stats.stage('frame'):
+        df = scrape_orders(pdf_bytes, profile, engine, as_frame=True, rejects=rejects)
+    with stats.stage('summaries'):
+        tables = build_tables(df, profile)
+        if rejects:
+            tables['Rejects'] = rejects_table(rejects)
+    with stats.stage('write'):
+        if response_format == 'json':
+            table_names = dict.fromkeys(table_name for _, table_name, _ in workbook_layout(tables, profile))
+            body = json.dumps({table_name: json.loads(tables[table_name].to_json(orient='records'))
+                               for table_name in table_names}).encode()
+        else:
+            buffer = io.BytesIO()
+            # Write-only mode keeps a large upload's workbook from holding a cell object per value
+            write_workbook(tables, buffer, profile, stream_xlsx=True)
+            body = buffer.getvalue()
+    return body, len(df), sum(reject['status'] == 'rejected' for reject in rejects), stats.snapshot()
+
+
+class ScrapeService:
+    def __init__(self, workers=2, max_pending=None, max_upload_mb=64, timeout=300):
+        self.workers = workers
+        self.max_pending = max_pending or workers * 4   # requests waiting or running before 503s
+        self.max_upload = max_upload_mb * 1024 * 1024
+        self.timeout = timeout
+        self.executor = None
+        self.slots = None
+        self.pending = 0
+        self.metrics = RunStats()               # request stages and counters, plus the workers' stages
+        self.latencies = deque(maxlen=1000)     # recent request seconds for the percentiles
+
+    def start(self):
+        self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=warm_worker)
+        # Each submit starts another process while none is idle, so this forks the whole pool now
+        for future in [self.executor.submit(time.sleep, 0.1) for _ in range(self.workers)]:
+            future.result()
+        self.slots = asyncio.Semaphore(self.workers)
+        print(f'[Service]: {self.workers} scrape worker(s) ready')
+
+    def stop(self):
+        if self.executor:
+            self.executor.shutdown(cancel_futures=True)
+            self.executor = None
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self.handle(scope, receive, send)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                self.start()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.stop()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def handle(self, scope, receive, send):
+        route = (scope['method'], scope['path'])
+        if route == ('POST', '/scrape'):
+            await self.scrape(scope, receive, send)
+        elif route == ('GET', '/metrics'):
+            await respond(send, 200, json.dumps(self.metrics_report(), indent=2).encode(), 'application/json')
+        elif route == ('GET', '/'):
+            stores = ''.join(f'<option{" selected" if name == default_profile else ""}>{name}</option>'
+                             for name in sorted(profiles))
+            await respond(send, 200, upload_page % {b'stores': stores.encode()}, 'text/html; charset=utf-8')
+        else:
+            await respond(send, 404, b'Not found\n')
+
+    async def scrape(self, scope, receive, send):
+        start_time = time.perf_counter()
+        self.metrics.count('requests')
+        query = {name: values[-1] for name, values in parse_qs(scope['query_string'].decode()).items()}
+        store = query.get('store', default_profile)
+        engine = query.get('engine', 'text')
+        response_format = query.get('format', 'xlsx')
+        if store not in profiles or engine not in ('layout', 'text') or response_format not in ('json', 'xlsx'):
+            return await self.finish(send, start_time, 400, b'store, engine or format not recognised\n')
+        if self.pending >= self.max_pending:
+            self.metrics.count('rejected')
+            return await self.finish(send, start_time, 503, b'Too many scrapes in progress, retry shortly\n',
+                                     headers=[(b'retry-after', b'1')])
+
+        self.pending += 1
+        try:
+            pdf_bytes = await read_body(receive, self.max_upload)
+            if pdf_bytes is None:
+                return await self.finish(send, start_time, 413, b'Upload too large\n')
+            if not pdf_bytes.startswith(b'%PDF'):
+                return await self.finish(send, start_time, 400, b'The request body is not a PDF\n')
+            self.metrics.count('bytes_in', len(pdf_bytes))
+            if self.executor is None:
+                # Servers without lifespan support start the pool on the first request
+                self.start()
+
+            queue_start = time.perf_counter()
+            slots = self.slots
+            await slots.acquire()
+            scrape_start = time.perf_counter()
+            try:
+                future = self.executor.submit(scrape_upload, pdf_bytes, store, engine, response_format)
+            except BaseException:
+                slots.release()
+                raise
+            # The slot is given back when the worker is done with the scrape, not when this request
+            # stops waiting for it: after a 504 the scrape runs on and still holds its worker
+            loop = asyncio.get_running_loop()
+            future.add_done_callback(lambda _: loop.call_soon_threadsafe(slots.release))
+            try:
+                body, row_count, reject_count, worker_stats = await asyncio.wait_for(asyncio.wrap_future(future),
+                                                                                     self.timeout)
+            except asyncio.TimeoutError:
+                return await self.finish(send, start_time, 504, b'Scrape timed out\n')
+            except Exception as e:
+                self.metrics.count('errors')
+                return await self.finish(send, start_time, 422,
+                                         f'Could not scrape the PDF: {type(e).__name__}: {e}\n'.encode())
+            scrape_seconds = time.perf_counter() - scrape_start
+        finally:
+            self.pending -= 1
+
+        queue_seconds = scrape_start - queue_start
+        self.metrics.seconds['queue'] += queue_seconds
+        self.metrics.seconds['scrape'] += scrape_seconds
+        self.metrics.merge(worker_stats)
+        self.metrics.count('rows', row_count)
+        self.metrics.count('bytes_out', len(body))
+        headers = [(b'x-rows', str(row_count).encode()), (b'x-rejected-orders', str(reject_count).encode()),
+                   (b'x-kept-orders', str(worker_stats['counters'].get('kept_orders', 0)).encode())]
+        if response_format == 'xlsx':
+            headers.append((b'content-disposition', b'attachment; filename="Order details.xlsx"'))
+        await self.finish(send, start_time, 200, body, 'application/json' if response_format == 'json' else xlsx_type,
+                          headers, f'queue;dur={queue_seconds * 1000:.1f}, scrape;dur={scrape_seconds * 1000:.1f}, ')
+
+    async def finish(self, send, start_time, status, body, content_type='text/plain; charset=utf-8', headers=(),
+                     timing=''):
+        # Every response carries its timings in a Server-Timing header, which browsers' dev tools show
+        elapsed = time.perf_counter() - start_time
+        self.metrics.count(f'status_{status}')
+        self.latencies.append(elapsed)
+        timing += f'total;dur={elapsed * 1000:.1f}'
+        await respond(send, status, body, content_type, list(headers) + [(b'server-timing', timing.encode())])
+
+    def metrics_report(self):
+        latencies = sorted(self.latencies)
+        percentiles = {}
+        if latencies:
+            for name, fraction in [('p50', 0.5), ('p95', 0.95), ('max', 1.0)]:
+                percentiles[name] = round(latencies[min(int(fraction * len(latencies)), len(latencies) - 1)], 4)
+        return {
+            'workers': self.workers,
+            'pending': self.pending,
+            'max_pending': self.max_pending,
+            'latency_seconds': percentiles,
+            'stage_seconds': {name: round(seconds, 4) for name, seconds in
+                              sorted(self.metrics.seconds.items(), key=lambda item: -item[1])},
+            'counters': dict(sorted(self.metrics.counters.items())),
+        }
+
+
+async def read_body(receive, max_bytes):
+    # Returns the request body, or None once it grows past max_bytes
+    chunks, size = [], 0
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            break
+        chunk = message.get('body', b'')
+        size += len(chunk)
+        if size > max_bytes:
+            return None
+        chunks.append(chunk)
+        if not message.get('more_body'):
+            break
+    return b''.join(chunks)
+
+
+async def respond(send, status, body, content_type='text/plain; charset=utf-8', headers=()):
+    # Sends the body in chunks, so a large workbook goes out as it is read from memory
+    await send({'type': 'http.response.start', 'status': status,
+                'headers': [(b'content-type', content_type.encode()),
+                            (b'content-length', str(len(body)).encode())] + list(headers)})
+    for offset in range(0, len(body), chunk_size):
+        await send({'type': 'http.response.body', 'body': body[offset:offset + chunk_size],
+                    'more_body': offset + chunk_size < len(body)})
+    if not body:
+        await send({'type': 'http.response.body', 'body': b''})
+
+
+# For `uvicorn pdf_scrape.service:app`; the pool is only started with the server
+app = ScrapeService()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve POST /scrape for uploaded order PDFs.')
+    parser.add_argument('--host', default='127.0.0.1', help='interface to listen on (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8000, help='port to listen on (default: 8000)')
+    parser.add_argument('--workers', type=int, default=2, help='scrape worker processes (default: 2)')
+    parser.add_argument('--max-pending', type=int,
+                        help='requests waiting or running before new ones get 503 (default: 4 per worker)')
+    parser.add_argument('--max-upload-mb', type=int, default=64, help='largest accepted PDF in MB (default: 64)')
+    parser.add_argument('--timeout', type=float, default=300, help='seconds one scrape may take (default: 300)')
+    args = parser.parse_args(argv)
+
+    try:
+        import uvicorn
+    except ImportError:
+        print('[ERROR]: the scrape service needs an ASGI server, pip install uvicorn')
+        return
+    service = ScrapeService(args.workers, args.max_pending, args.max_upload_mb, args.timeout)
+    uvicorn.run(service, host=args.host, port=args.port, lifespan='on')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+import time
+
+
+class RunStats:
+    # Per-stage timers and counters for the run report. Stage times are exclusive: time spent in
+    # a stage started inside another one (buyer inside parse, extract inside frame while the rows
+    # are pulled through) is only counted once, under the inner stage.
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.seconds = defaultdict(float)
+        self.counters = Counter()
+        self.nested = []
+        self.rejects = []       # orders that failed to parse, see scrape.reject_order()
+        self.order_warnings = []    # warnings about the order being parsed, see scrape.iter_order_items()
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        self.nested.append(0.0)
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.seconds[name] += elapsed - self.nested.pop()
+            if self.nested:
+                self.nested[-1] += elapsed
+
+    def count(self, name, n=1):
+        self.counters[name] += n
+
+    def snapshot(self):
+        return {'seconds': dict(self.seconds), 'counters': dict(self.counters), 'rejects': list(self.rejects)}
+
+    def merge(self, snapshot):
+        # Adds the stages, counters and rejects a worker process sent back with its shard
+        for name, seconds in snapshot['seconds'].items():
+            self.seconds[name] += seconds
+        self.counters.update(snapshot['counters'])
+        self.rejects += snapshot.get('rejects', [])
+
+
+# One collector per process; worker processes send theirs back with each shard
+stats = RunStats()
+
+
+def warn(counter, message):
+    stats.count(counter)
+    stats.count('warnings')
+    stats.order_warnings.append(message)
+    print(message)
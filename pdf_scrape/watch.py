@@ -0,0 +1,89 @@
+import os
+import threading
+import time
+
+
+class WakeHandler:
+    # watchdog event handler: any change in the folder wakes the watch loop for a rescan
+    def __init__(self, wake):
+        self.wake = wake
+
+    def dispatch(self, event):
+        self.wake.set()
+
+
+def start_observer(input_dir, wake):
+    try:
+        from watchdog.observers import Observer
+    except ImportError:
+        return None
+    observer = Observer()
+    observer.schedule(WakeHandler(wake), input_dir)
+    observer.start()
+    return observer
+
+
+def pdf_snapshot(input_dir):
+    snapshot = {}
+    for entry in os.scandir(input_dir):
+        if entry.name.endswith('.pdf') and entry.is_file():
+            stat = entry.stat()
+            snapshot[entry.path] = (stat.st_size, stat.st_mtime)
+    return snapshot
+
+
+def pdf_complete(file_path):
+    # A PDF that is still being copied or exported is cut off before its trailing %%EOF marker
+    try:
+        with open(file_path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            f.seek(max(f.tell() - 1024, 0))
+            return b'%%EOF' in f.read()
+    except OSError:
+        return False
+
+
+def watch_folder(input_dir, on_ready, poll_seconds=1.0, debounce_seconds=2.0):
+    # Calls on_ready(file_paths) with the new or changed PDFs once the folder has been quiet for
+    # debounce_seconds, so a batch of exports dropped together is scraped in one go. PDFs already
+    # in the folder count as new on start. Runs until interrupted.
+    wake = threading.Event()
+    observer = start_observer(input_dir, wake)
+    if observer:
+        print(f'[Watching]: {input_dir} for new PDFs')
+    else:
+        print(f'[Watching]: {input_dir} for new PDFs, polling every {poll_seconds:g}s (install watchdog for '
+              f'file system events)')
+    handled = {}
+    previous, quiet_since = None, time.monotonic()
+    try:
+        while True:
+            snapshot = pdf_snapshot(input_dir)
+            if snapshot != previous:
+                previous, quiet_since = snapshot, time.monotonic()
+            pending = [file_path for file_path, signature in snapshot.items() if handled.get(file_path) != signature]
+            if pending and time.monotonic() - quiet_since >= debounce_seconds:
+                ready = sorted(file_path for file_path in pending if pdf_complete(file_path))
+                for file_path in pending:
+                    if file_path not in ready:
+                        # Picked up again as soon as it changes
+                        print(f'[Skipped]: {os.path.basename(file_path)} is incomplete')
+                    handled[file_path] = snapshot[file_path]
+                pending = []
+                if ready:
+                    try:
+                        on_ready(ready)
+                    except Exception as e:
+                        # A bad export must not stop the watcher; it is retried once it changes
+                        print(f'[ERROR]: {type(e).__name__}: {e}')
+            if observer is None:
+                time.sleep(poll_seconds)
+            else:
+                wake.wait(debounce_seconds if pending else None)
+                wake.clear()
+    except KeyboardInterrupt:
+        print('[Stopped]')
+    finally:
+        if observer:
+            observer.stop()
+            observer.join()